@@ -0,0 +1,364 @@
+import argparse
+import contextlib
+from datetime import date
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import language_info
+
+"""
+# Use
+cd DialectOntology
+python3 benchmark.py
+
+# Fewer and smaller inputs, with 80% of the names found in Glottolog
+python3 benchmark.py --sizes 10,1000 --hit-ratio 0.8 --repeat 1
+
+# Compare with stored results (exit status 1 if a stage got slower than the tolerance)
+python3 benchmark.py --output ./data/benchmark/baseline.json
+python3 benchmark.py --baseline ./data/benchmark/baseline.json --tolerance 0.2
+
+# Other arguments are passed on to language_info.py
+python3 benchmark.py --sizes 1000 --match fuzzy --max-depth 0
+"""
+
+""" Process
+==== 1. Load the reference data (parsing the files and from the snapshot)
+==== 2. Create input files: synthetic ones with a given number of names and
+		the existing inputs in ./languages/ (German, German .large, Kurdish)
+==== 3. Run each input as a project in a temporary directory and time each stage
+==== 4. Write the results to a json file (and compare them with a baseline)
+"""
+
+"""
+===========================================================================
+Stages of the Pipeline
+===========================================================================
+"""
+# Stage name → function in language_info.py, timed whenever it is called during a run
+# NOTE: Times of a function called several times (such as in the expansion rounds) are summed up
+pipeline_stages = {
+	"input":"read_language_names",
+	"name_match_index":"get_name_match_index",
+	"glottolog_ld":"filter_glottolog_ld_data",
+	"glottolog_l":"filter_glottolog_l_data",
+	"select_iso_codes":"select_iso_codes",
+	"ethnologue":"filter_ethnologue_li",
+	"filter_ethno_new":"filter_ethno_new",
+	"output":"write_output_file"
+}
+
+# =========================================================================
+# Replace the stage functions with wrappers adding their time to stage_times
+def instrument_stages(stage_times):
+	original_functions = {}
+	for stage, function_name in pipeline_stages.items():
+		original_function = getattr(language_info, function_name)
+		original_functions[function_name] = original_function
+
+		def timed_function(*args, _stage=stage, _function=original_function, **kwargs):
+			stage_start = time.perf_counter()
+			try:
+				return _function(*args, **kwargs)
+			finally:
+				stage_times[_stage] = stage_times.get(_stage, 0.0) + time.perf_counter() - stage_start
+		setattr(language_info, function_name, timed_function)
+	return original_functions
+
+# =========================================================================
+# Put the original stage functions back
+def restore_stages(original_functions):
+	for function_name, original_function in original_functions.items():
+		setattr(language_info, function_name, original_function)
+
+
+"""
+===========================================================================
+Benchmark Inputs
+===========================================================================
+"""
+# =========================================================================
+# Names to sample from: names found in Glottolog (hits) and names only in Ethnologue (misses)
+def sample_pools(reference_tables):
+	# NOTE: Row 0 is the header row of each table
+	hit_names = set()
+	for name_index in [reference_tables["glotto_langdial_names"], reference_tables["glotto_lang_names"]]:
+		hit_names.update(name for name, row_number in name_index.items() if row_number != 0)
+	ethno_names = set(reference_tables["ethno_langindex"].column(2))
+	ethno_names.discard("Name")
+	miss_names = ethno_names - hit_names
+	return sorted(hit_names), sorted(miss_names)
+
+# =========================================================================
+# Synthetic list of names, hit_ratio of them are names found in Glottolog
+def synthetic_names(size, hit_ratio, hit_pool, miss_pool, seed=0):
+	rng = random.Random(f'{seed}-{size}-{hit_ratio}')
+	hit_count = round(size * hit_ratio)
+	names = sample_names(rng, hit_pool, hit_count)
+	names.extend(sample_names(rng, miss_pool, size - hit_count))
+	rng.shuffle(names)
+	return names
+
+# Distinct names as long as the pool is large enough, names with a numbered suffix after that
+def sample_names(rng, pool, count):
+	names = rng.sample(pool, min(count, len(pool)))
+	round_number = 1
+	while len(names) < count:
+		# NOTE: Suffixed names are never found, they are only used for sizes beyond the pool
+		names.extend(f'{name} {round_number}' for name in rng.sample(pool, min(count - len(names), len(pool))))
+		round_number += 1
+	return names
+
+# =========================================================================
+# Input name → (file name, content) for each input file to benchmark
+def benchmark_inputs(reference_tables, sizes, hit_ratio, seed=0, real_inputs=True):
+	inputs = {}
+	hit_pool, miss_pool = sample_pools(reference_tables)
+	for size in sizes:
+		names = synthetic_names(size, hit_ratio, hit_pool, miss_pool, seed)
+		inputs[f'synthetic-{size}'] = ("input_varieties.txt", ''.join(f'{name}\n' for name in names))
+
+	# Existing inputs in ./languages/
+	if real_inputs:
+		real_input_files = {
+			"german":'./languages/German/input_varieties.txt',
+			"german-large":'./languages/German/input_varieties.txt.large',
+			"kurdish":'./languages/Kurdish/input_varieties.json'
+		}
+		for input_name, input_file in real_input_files.items():
+			if not os.path.isfile(input_file):
+				print(f'Benchmark: skipping {input_name}, {input_file} not found')
+				continue
+			file_name = "input_varieties.json" if input_file.endswith(".json") else "input_varieties.txt"
+			with open(input_file, 'r') as f:
+				inputs[input_name] = (file_name, f.read())
+	return inputs
+
+
+"""
+===========================================================================
+Running the Benchmark
+===========================================================================
+"""
+# =========================================================================
+# Time loading the reference data from the source files and from the snapshot
+def benchmark_loading(repeat):
+	load_times = {"load_parse":[], "load_snapshot":[]}
+	with contextlib.redirect_stdout(io.StringIO()):
+		# Make sure the snapshots exist
+		language_info.ReferenceTables(language_info.reference_source_paths, language_info.reference_cache_path).load_all()
+		for _ in range(repeat):
+			load_start = time.perf_counter()
+			language_info.ReferenceTables(language_info.reference_source_paths, language_info.reference_cache_path, use_cache=False).load_all()
+			load_times["load_parse"].append(time.perf_counter() - load_start)
+
+			# NOTE: All tables are loaded up front, so the runs below only time the pipeline itself
+			load_start = time.perf_counter()
+			reference_tables = language_info.ReferenceTables(language_info.reference_source_paths, language_info.reference_cache_path)
+			reference_tables.load_all()
+			load_times["load_snapshot"].append(time.perf_counter() - load_start)
+	return reference_tables, {stage:min(stage_times) for stage, stage_times in load_times.items()}
+
+# =========================================================================
+# Run one input as a project in work_path and time each stage (best of repeat runs)
+def benchmark_input(input_name, input_file, reference_tables, project_args, work_path, repeat, verbose=False):
+	file_name, content = input_file
+	lang = f'benchmark-{input_name}'
+	input_path = f'{work_path}/languages/{lang}/'
+	os.makedirs(input_path, exist_ok=True)
+	with open(f'{input_path}{file_name}', 'w') as f:
+		f.write(content)
+
+	runs = []
+	project_summary = None
+	for _ in range(repeat):
+		# NOTE: A fresh copy of the outputs for each run, so every run writes all files
+		shutil.rmtree(f'{input_path}inter', ignore_errors=True)
+		shutil.rmtree(f'{input_path}output', ignore_errors=True)
+		stage_times = {}
+		original_functions = instrument_stages(stage_times)
+		output_target = sys.stdout if verbose else io.StringIO()
+		current_path = os.getcwd()
+		try:
+			os.chdir(work_path)
+			with contextlib.redirect_stdout(output_target):
+				run_start = time.perf_counter()
+				project_summary = language_info.run_project(lang, input_name, reference_tables, project_args)
+				stage_times["total"] = time.perf_counter() - run_start
+		finally:
+			os.chdir(current_path)
+			restore_stages(original_functions)
+		runs.append(stage_times)
+
+	stage_names = list(runs[0].keys())
+	result = {
+		"input":input_name,
+		"input_names":count_input_names(content, file_name),
+		"dialects":project_summary["dialects"],
+		"dialects_with_info":project_summary["dialects_with_info"],
+		"stages":{stage:min(run.get(stage, 0.0) for run in runs) for stage in stage_names}
+	}
+	return result
+
+# Number of names in an input file
+def count_input_names(content, file_name):
+	if file_name.endswith(".json"):
+		dialect_info = json.loads(content)
+		return sum(len(dialect_info["dialects"][dialect_name]["nameOrthographies"]) for dialect_name in dialect_info["dialects"].keys())
+	return len(content.splitlines())
+
+# =========================================================================
+# Description of the environment the results were measured in
+def benchmark_environment(reference_tables):
+	git_revision = None
+	try:
+		git_revision = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		pass
+	return {
+		"date":date.today().strftime("%d.%m.%Y"),
+		"git_revision":git_revision,
+		"python":platform.python_version(),
+		"platform":platform.platform(),
+		"reference_version":reference_tables["version"]
+	}
+
+
+"""
+===========================================================================
+Comparison with a Baseline
+===========================================================================
+"""
+# =========================================================================
+# Stages that got slower than the baseline by more than tolerance (and more than min_seconds)
+def compare_with_baseline(results, baseline, tolerance=0.2, min_seconds=0.005):
+	baseline_times = {("load", stage):seconds for stage, seconds in baseline["load"].items()}
+	for baseline_result in baseline["results"]:
+		for stage, seconds in baseline_result["stages"].items():
+			baseline_times[(baseline_result["input"], stage)] = seconds
+
+	current_times = {("load", stage):seconds for stage, seconds in results["load"].items()}
+	for result in results["results"]:
+		for stage, seconds in result["stages"].items():
+			current_times[(result["input"], stage)] = seconds
+
+	comparison = []
+	for key, seconds in current_times.items():
+		if key not in baseline_times:
+			continue
+		baseline_seconds = baseline_times[key]
+		comparison.append({
+			"input":key[0],
+			"stage":key[1],
+			"baseline":baseline_seconds,
+			"current":seconds,
+			"ratio":seconds / baseline_seconds if baseline_seconds > 0 else None,
+			"regression":seconds > baseline_seconds * (1 + tolerance) and seconds - baseline_seconds > min_seconds
+		})
+	return comparison
+
+# =========================================================================
+# Print the results as a table of seconds per input and stage
+def print_results(results):
+	stage_names = ["total"] + list(pipeline_stages.keys())
+	print(f'{"Input":<22}{"Names":>8}{"Found":>8}' + ''.join(f'{stage[:12]:>13}' for stage in stage_names))
+	for result in results["results"]:
+		line = f'{result["input"]:<22}{result["input_names"]:>8}{result["dialects_with_info"]:>8}'
+		line += ''.join(f'{result["stages"].get(stage, 0.0):>13.4f}' for stage in stage_names)
+		print(line)
+	for stage, seconds in results["load"].items():
+		print(f'{stage:<22}{seconds:>16.4f}')
+
+def print_comparison(comparison):
+	print(f'{"Input":<22}{"Stage":<18}{"Baseline":>10}{"Current":>10}{"Ratio":>8}')
+	for entry in comparison:
+		ratio = f'{entry["ratio"]:.2f}' if entry["ratio"] is not None else '-'
+		marker = '  REGRESSION' if entry["regression"] else ''
+		print(f'{entry["input"]:<22}{entry["stage"]:<18}{entry["baseline"]:>10.4f}{entry["current"]:>10.4f}{ratio:>8}{marker}')
+
+
+"""
+===========================================================================
+Execution of Script
+===========================================================================
+"""
+def main():
+	parser = argparse.ArgumentParser(description='Benchmark language_info.py', epilog='Other arguments are passed on to language_info.py')
+	parser.add_argument('--sizes', type=str, help='comma separated numbers of names of the synthetic inputs', default="10,100,1000,10000,100000")
+	parser.add_argument('--hit-ratio', type=float, help='share of synthetic names found in Glottolog (0 to 1)', default=0.5)
+	parser.add_argument('--seed', type=int, help='seed for sampling the synthetic names', default=0)
+	parser.add_argument('--no-real', action='store_true', help='only benchmark synthetic inputs, not the inputs in ./languages/')
+	parser.add_argument('--repeat', type=int, help='runs per input, the fastest time of each stage is kept', default=3)
+	parser.add_argument('--output', type=str, help='json file for the results', default='./data/benchmark/results.json')
+	parser.add_argument('--baseline', type=str, help='json file with earlier results to compare with', default=None)
+	parser.add_argument('--tolerance', type=float, help='allowed slowdown compared with the baseline (0.2: 20%%)', default=0.2)
+	parser.add_argument('--verbose', action='store_true', help='show the output of language_info.py')
+	args, project_arguments = parser.parse_known_args()
+	# NOTE: The progress messages of language_info.py go to stdout, which is redirected unless --verbose
+	language_info.show_progress()
+
+	# NOTE: Terms are always looked up, results of earlier runs would hide the lookup time
+	project_args = language_info.build_argument_parser().parse_args(project_arguments + ['--no-term-cache'])
+	sizes = [int(size) for size in args.sizes.split(',') if size.strip() != '']
+
+	print('Benchmark: loading reference data')
+	reference_tables, load_times = benchmark_loading(args.repeat)
+	inputs = benchmark_inputs(reference_tables, sizes, args.hit_ratio, args.seed, real_inputs=not args.no_real)
+
+	results = {
+		"environment":benchmark_environment(reference_tables),
+		"settings":{
+			"sizes":sizes,
+			"hit_ratio":args.hit_ratio,
+			"seed":args.seed,
+			"repeat":args.repeat,
+			"arguments":project_arguments
+		},
+		"load":load_times,
+		"results":[]
+	}
+	work_path = tempfile.mkdtemp(prefix='dialect_ontology_benchmark_')
+	try:
+		for input_name, input_file in inputs.items():
+			print(f'Benchmark: {input_name}')
+			results["results"].append(benchmark_input(input_name, input_file, reference_tables, project_args, work_path, args.repeat, args.verbose))
+	finally:
+		shutil.rmtree(work_path, ignore_errors=True)
+	print_results(results)
+
+	regressions = []
+	if args.baseline:
+		with open(args.baseline, 'r') as f:
+			baseline = json.load(f)
+		results["baseline"] = {
+			"file":args.baseline,
+			"environment":baseline["environment"],
+			"tolerance":args.tolerance,
+			"comparison":compare_with_baseline(results, baseline, args.tolerance)
+		}
+		print_comparison(results["baseline"]["comparison"])
+		regressions = [entry for entry in results["baseline"]["comparison"] if entry["regression"]]
+
+	output_directory = os.path.dirname(args.output)
+	if output_directory:
+		os.makedirs(output_directory, exist_ok=True)
+	with open(args.output, 'w') as f:
+		f.write(json.dumps(results, indent=4))
+	print(f'Benchmark: results written to {args.output}')
+
+	if regressions:
+		print(f'Benchmark: {len(regressions)} stage(s) slower than the baseline')
+		sys.exit(1)
+
+
+if __name__ == "__main__":
+
+	main()
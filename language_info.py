@@ -1,11 +1,37 @@
 
 import argparse
+import array
+import bisect
+import concurrent.futures
+import contextlib
+import copy
+import cProfile
 import csv
+import filecmp
 from datetime import date
+import gc
 import glob
+import hashlib
+import http.server
+import itertools
 import json
+import logging
+import math
+import multiprocessing
 import os
+import pickle
+try:
+	import resource
+except ImportError:
+	# NOTE: Not available on Windows, the profile report has no peak memory there
+	resource = None
+import socketserver
+import sqlite3
 import sys
+import threading
+import time
+import unicodedata
+import urllib.parse
 
 """ 
 # Setup
@@ -19,6 +45,69 @@ python3 -m venv venvDO
 cd DialectOntology
 source ./../venvDO/bin/activate
 python3 language_info.py --lang German --proj "German Varieties"
+
+# Look up newly found names until no new names are found (at most 500 new names)
+python3 language_info.py --lang Kurdish --max-depth 0 --max-names 500
+
+# Very large inputs (.txt or .jsonl) are read streaming, repeated names dropped and distinct names looked up in chunks
+# NOTE: Only reading the input is streamed, the distinct names and their results are still all kept for the output
+python3 language_info.py --lang German --chunk-size 10000
+
+# Look up the terms of a very large input in 4 worker processes (same output as a single process)
+python3 language_info.py --lang German --chunk-size 100000 --resolve-workers 4
+
+# Varieties with coordinates as GeoJSON tiles for the map (output/geojson/<zoom>/<x>/<y>.geojson and index.json)
+python3 language_info.py --lang Kurdish --geojson --geojson-zoom 5
+
+# Reverse lookup: all names Ethnologue lists in Iraq, or all Glottolog dialects in Eurasia for sdh (added to a project's input)
+python3 language_info.py --query --country IQ
+# NOTE: Isolates are languages as well, Basque is listed together with its dialects
+python3 language_info.py --query --iso eus
+python3 language_info.py --query --macroarea Eurasia --iso sdh --level dialect --lang Kurdish --seed-input
+
+# Type-ahead completion of names, and the completion index as compact json for the frontend
+python3 language_info.py --complete "sor" --top-k 10
+python3 language_info.py --export-completion ./completion_index.json
+
+# After dropping a new Glottolog or Ethnologue release into ./data/: only look up what changed, with a report per project
+python3 language_info.py --all --release-diff
+
+# The parsed reference data is kept as snapshots in ./data/cache/ (rebuilt when files in ./data/ change)
+# NOTE: Tables are only loaded when needed, a re-run with all terms in the term cache loads none
+python3 language_info.py --lang Kurdish --rebuild-cache
+
+# Results per term are kept in ./data/cache/terms/ as well, re-runs only look up new terms
+python3 language_info.py --lang Kurdish --no-term-cache
+
+# Write compact output (or JSON Lines) and skip the intermediate files
+# NOTE: JSON Lines replace the .json files of the same name (and the other way round), the old format is removed
+python3 language_info.py --lang Kurdish --output-format jsonl --no-inter
+
+# Also match names without exact match ("Soranî" → "Sorani", "Kurdish, Northern" → "Northern Kurdish")
+python3 language_info.py --lang Kurdish --match fuzzy --match-threshold 0.8
+
+# Also add the dialects of each found language (descendants) or its family (ancestors)
+python3 language_info.py --lang Kurdish --family descendants
+
+# Also add the varieties within 200 km of each found variety (or the 5 nearest ones)
+python3 language_info.py --lang Kurdish --near-radius 200
+python3 language_info.py --lang Kurdish --near-k 5
+
+# Also write reference data and results to an indexed SQLite database
+python3 language_info.py --lang Kurdish --sqlite ./dialect_ontology.sqlite
+
+# Write time per stage, lookup counts and peak memory to ./languages/Kurdish/output/profile.json (and cProfile statistics)
+python3 language_info.py --lang Kurdish --profile --profile-stats
+
+# Use as library in other Python code (reference data loaded once per session)
+python3 -c 'from language_info import DialectOntology; print(DialectOntology().resolve(["Central Kurdish"]))'
+
+# Process several (or all) projects in ./languages/ in one batch, the reference data is loaded once
+python3 language_info.py --langs German,Kurdish --workers 2
+python3 language_info.py --all
+
+# Keep the reference data loaded and answer lookups (see "Lookup Service" below)
+python3 language_info.py --serve --port 8765
 """
 
 
@@ -34,525 +123,2751 @@ python3 language_info.py --lang German --proj "German Varieties"
 ==== 6. Write language information as dictionaries to json file
 """
 
-def main():
-	parser = argparse.ArgumentParser(description='Create Configuration')
-	parser.add_argument('--lang', type=str, help='directory of language data', default="Kurdish")
-	parser.add_argument('--proj', type=str, help='project name', default="Kurdish Varieties Showcase")
-
-	args = parser.parse_args()
-	input_path = f'./languages/{args.lang}/'
-
-	"""
-	===========================================================================
-	Helper Functions
-	===========================================================================
-	"""
-	def read_csv_file(input_file, newline='', delimiter=',', quotechar='"'):
-		data_rows = []
-		with open(input_file, newline=newline) as csv_file:
-			csv_reader = csv.reader(csv_file, delimiter=delimiter, quotechar=quotechar)
-			for row in csv_reader:
-				data_rows.append(row)
-		return data_rows
-	
-	def create_directory(path):
-		# Check whether directory already exists
-		if not os.path.exists(path):
-			os.mkdir(path)
-			print("Folder %s created!" % path)
+"""
+===========================================================================
+Helper Functions
+===========================================================================
+"""
+# Progress messages of a run, shown on stdout when run as a script (show_progress in main)
+# NOTE: Silent when used as library, unless DialectOntology(verbose=True) or the logger "language_info" is configured
+logger = logging.getLogger("language_info")
+
+# Writes each message to the current sys.stdout (redirecting stdout, as benchmark.py does, also redirects the messages)
+class StdoutHandler(logging.Handler):
+	def emit(self, record):
+		try:
+			sys.stdout.write(f'{self.format(record)}\n')
+		except Exception:
+			self.handleError(record)
+
+def show_progress():
+	if not any(isinstance(handler, StdoutHandler) for handler in logger.handlers):
+		logger.addHandler(StdoutHandler())
+	logger.setLevel(logging.INFO)
+	# NOTE: Otherwise a configured root logger would show each message twice
+	logger.propagate = False
+
+def read_csv_file(input_file, newline='', delimiter=',', quotechar='"'):
+	data_rows = []
+	with open(input_file, newline=newline) as csv_file:
+		csv_reader = csv.reader(csv_file, delimiter=delimiter, quotechar=quotechar)
+		for row in csv_reader:
+			data_rows.append(row)
+	return data_rows
+
+# Write a text file piece by piece, but leave it untouched if its content did not change
+# NOTE: The pieces are streamed into a temporary file, so the whole content is never held in memory
+def write_output_file(output_file, chunks):
+	with profile_stage("write_output"):
+		with open(f'{output_file}.tmp', "w") as outfile:
+			for chunk in chunks:
+				outfile.write(chunk)
+		if profile_metrics is not None:
+			count_metric("output", "bytes", os.path.getsize(f'{output_file}.tmp'))
+		if os.path.isfile(output_file) and filecmp.cmp(f'{output_file}.tmp', output_file, shallow=False):
+			os.remove(f'{output_file}.tmp')
+			file_written = False
+		else:
+			os.replace(f'{output_file}.tmp', output_file)
+			file_written = True
+		if profile_metrics is not None:
+			count_metric("output", "files_written" if file_written else "files_unchanged")
+	return file_written
+
+# Serialize a dictionary piece by piece (the same text as json.dumps with indent=4, or without whitespace if compact)
+# NOTE: Dictionaries are split into one piece per item down to stream_depth, deeper values are serialized at once
+def json_chunks(data, compact=False, stream_depth=1, level=0):
+	if level >= stream_depth or not isinstance(data, dict) or not data:
+		if compact:
+			yield json.dumps(data, separators=(',', ':'))
 		else:
-			print("Folder %s already exists" % path)
+			yield json.dumps(data, indent=4).replace('\n', '\n' + '    '*level)
+		return
+	yield '{'
+	for item_number, (key, value) in enumerate(data.items()):
+		if compact:
+			yield f'{"," if item_number else ""}{json.dumps(key)}:'
+		else:
+			yield f'{"," if item_number else ""}\n{"    "*(level+1)}{json.dumps(key)}: '
+		yield from json_chunks(value, compact, stream_depth, level+1)
+	if compact:
+		yield '}'
+	else:
+		yield f'\n{"    "*level}}}'
+
+# Serialize a dictionary as JSON Lines, one object {key: value} per item
+def jsonl_chunks(data):
+	for key, value in data.items():
+		yield json.dumps({key:value}) + '\n'
+
+# Write a dictionary as json file (indented, compact or as JSON Lines with the extension .jsonl)
+# NOTE: The file of the other extension (from a run with another --output-format) is removed, so no stale data is left
+def write_json_file(output_file, data, output_format="indent", stream_depth=1):
+	jsonl_file = f'{os.path.splitext(output_file)[0]}.jsonl'
+	if output_format == "jsonl":
+		output_file, stale_file = jsonl_file, output_file
+	else:
+		stale_file = jsonl_file
+	if os.path.isfile(stale_file):
+		os.remove(stale_file)
+	if output_format == "jsonl":
+		return write_output_file(output_file, jsonl_chunks(data))
+	return write_output_file(output_file, json_chunks(data, output_format == "compact", stream_depth))
+
+def create_directory(path):
+	# Check whether directory already exists
+	if not os.path.exists(path):
+		os.mkdir(path)
+		logger.info("Folder %s created!" % path)
+	else:
+		logger.info("Folder %s already exists" % path)
 
 
-	"""
-	===========================================================================
-	Paths to Directories and Files
-	===========================================================================
-	"""
-	# Project Files
-	input_eth_countrycodes = './data/ethnologue/CountryCodes.tab'
-	input_eth_languagecodes = './data/ethnologue/LanguageCodes.tab'
-	input_eth_languageindex = './data/ethnologue/LanguageIndex.tab'
-	input_glo_languages = './data/glottolog/languages.csv'
-	input_glo_languagesanddialectsgeo = './data/glottolog/languages_and_dialects_geo.csv'
-	
-	# Language Files
-	inter_path = f'{input_path}/inter/'
-	output_path = f'{input_path}/output/'
-	
-	# Create output directory if not existing
-	create_directory(inter_path)
-	create_directory(output_path)
-	
+""" 
+===========================================================================
+Profiling
+===========================================================================
+INPUT:	The stages of a run (--profile).
+OUTPUT: A report ./languages/<lang>/output/profile.json with the wall time 
+		per stage, rows read, index hits and misses, terms resolved per 
+		source, output written and peak memory of the process.
+		Optional (--profile-stats): a cProfile dump profile.pstats, 
+		to be read with python3 -m pstats.
+		Without --profile, profile_metrics is None and every stage is
+		entered through the same empty context, nothing is counted.
+"""
+profile_metrics = None
+no_profile_stage = contextlib.nullcontext()
+
+# =========================================================================
+# Start collecting metrics (before the reference data is loaded)
+def start_profile():
+	global profile_metrics
+	profile_metrics = {
+		"reference_data":{},
+		"stages":{},
+		"counters":{}
+	}
 
-	""" 
-	===========================================================================
-	Manually collected Data
-	===========================================================================
-	INPUT:	A dictionary containing the language terms to be explored. 
-			TODO: Implement handling multiple formats of input file.
-	OUTPUT: A list of terms associated with language varieties.
-	"""
-	# =========================================================================
-	# Read provided list of language identifying terms
-	def read_language_names(input_path):
+# =========================================================================
+# Start the metrics of a new project, keeping those of loading the reference data
+# NOTE: Starts collecting if run_project is called with --profile from another script (such as benchmark.py)
+def reset_profile():
+	if profile_metrics is None:
+		start_profile()
+		return
+	profile_metrics["stages"] = {}
+	profile_metrics["counters"] = {}
+
+# =========================================================================
+# Context timing a stage, stages can be nested (the expansion contains the lookups of its rounds)
+def profile_stage(stage):
+	if profile_metrics is None:
+		return no_profile_stage
+	return timed_profile_stage(stage)
+
+@contextlib.contextmanager
+def timed_profile_stage(stage):
+	stage_start = time.perf_counter()
+	try:
+		yield
+	finally:
+		stage_metrics = profile_metrics["stages"].setdefault(stage, {"seconds":0.0, "calls":0})
+		stage_metrics["seconds"] += time.perf_counter() - stage_start
+		stage_metrics["calls"] += 1
+
+# =========================================================================
+# Add to a counter (only called if profile_metrics is not None)
+def count_metric(group, name, amount=1):
+	group_counters = profile_metrics["counters"].setdefault(group, {})
+	group_counters[name] = group_counters.get(name, 0) + amount
+
+# =========================================================================
+# Peak memory of this process in kilobytes (None if unknown)
+def peak_memory_kb():
+	if resource is None:
+		return None
+	max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	# NOTE: Bytes on macOS, kilobytes on Linux
+	if sys.platform == "darwin":
+		return max_rss // 1024
+	return max_rss
+
+# =========================================================================
+# Write the metrics of a project as json file
+def write_profile_report(output_file, lang, project_seconds, args):
+	profile_report = {
+		"lang":lang,
+		"date":date.today().strftime("%d.%m.%Y"),
+		"arguments":vars(args),
+		"seconds":round(project_seconds, 6),
+		"peak_memory_kb":peak_memory_kb(),
+		"reference_data":profile_metrics["reference_data"],
+		"stages":{stage:{"seconds":round(stage_metrics["seconds"], 6), "calls":stage_metrics["calls"]}
+			for stage, stage_metrics in profile_metrics["stages"].items()},
+		"counters":profile_metrics["counters"]
+	}
+	with open(output_file, "w") as outfile:
+		outfile.write(json.dumps(profile_report, indent=4))
+	logger.info(f'Profile: report written to {output_file}')
 
-		# List of all variations of names for the found dialects
-		dialect_word_list = []
 
-		# List everything in the language input directory but only consider files, not subdirectories
-		input_files = glob.glob(f'{input_path}*', recursive = False)
-		input_files = [f for f in input_files if os.path.isfile(f)]
-
-		for input_file in input_files:
-			# Check extension of current file
-			file_extension = os.path.basename(input_file).split(".")[-1]
-
-			# Read from .json file (structure such as in the Kurdish example file)
-			if file_extension in ["json", "jsonl"]:
-				
-				# Read word list from info file
-				with open(input_file, 'r') as f:
-					print(f'Reading file: {input_file}')
-					dialect_info = json.load(f)
-
-				# For each "super" item in the json
-				for dialect_name in dialect_info["dialects"].keys():
-					for dialect_name_variation in dialect_info["dialects"][dialect_name]["nameOrthographies"]:
-						dialect_word_list.append(dialect_name_variation)
-
-			# Read from .txt file (one name per line)
-			elif file_extension in ["txt"]:
-
-				# Read word list from info file
-				with open(input_file, 'r') as f:
-					print(f'Reading file: {input_file}')
-					dialect_names = f.readlines()
-				
-				# Get variety name from each text line
-				for dialect_name in dialect_names:
-					dialect_word_list.append(dialect_name.replace('\n',''))
-
-		return dialect_word_list
+""" 
+===========================================================================
+Column Tables
+===========================================================================
+INPUT:	Rows of a large reference table (as read by csv.reader).
+OUTPUT: The same rows stored column by column:
+		- only the columns the pipeline reads are kept,
+		- columns with few distinct values (such as macroareas, country IDs 
+		  or name types) are stored as small integer codes, 
+		- columns that are never looked up by value (such as coordinates) are
+		  packed into one string per column,
+		- all other values are interned, so repeated strings are stored once.
+		Rows are still read as table[row_number] → tuple of strings.
+"""
+class PackedColumn:
 
-	# =========================================================================
-	# Turn a list of words into a dictionary of keys
-	def word_list_to_dict(dialect_word_list):
+	# Strings of one column joined into a single string, value i is text[offsets[i]:offsets[i + 1]]
+	# NOTE: Used for columns that are not looked up by value, saving one string object per row
+	def __init__(self, text, offsets):
+		self.text = text
+		self.offsets = offsets
 
-		# Dictionary to hold aggregated info about terms from word_list
-		dialect_info_dict = {} 
+	@classmethod
+	def from_values(cls, values):
+		offsets = array.array('I', [0])
+		text_length = 0
+		for value in values:
+			text_length += len(value)
+			offsets.append(text_length)
+		return cls(''.join(values), offsets)
 
-		# Create a new item for each term in the dictionary
-		for term in dialect_word_list:
-			# These lists are later to be filled with info found
-			dialect_info_dict[term] = {}
+	def __len__(self):
+		return len(self.offsets) - 1
 
-		return dialect_info_dict
+	def __getitem__(self, row_number):
+		return self.text[self.offsets[row_number]:self.offsets[row_number + 1]]
 
 
-	""" 
-	===========================================================================
-	Glottolog Data
-	===========================================================================
-	INPUT:  A list of terms associated with language varieties.
-	OUTPUT: Additional information for each of these terms that is contained
-			in the Glottolog data, such as ISO codes used further below.
-	"""
-	# languages_and_dialects_geo.csv
-	""" Header:
-	['glottocode', 'name', 'isocodes', 'level', 'macroarea', 'latitude', 'longitude']
-	['3adt1234', '3Ad-Tekles', '', 'dialect', 'Africa', '', '']
-	['aala1237', 'Aalawa', '', 'dialect', 'Papunesia', '', '']
-	"""
-	# =========================================================================
-	# Read Glottolog (Languages and Dialects) Data
-	def read_glottolog_ld_data(input_file):
-		csv_glotto_langdial = read_csv_file(input_file, '', ',', '"')
-		#print(f'Glottolog Languages and Dialects:')
-		#print(csv_glotto_langdial[0])
-		#print(csv_glotto_langdial[1])
-		#print(csv_glotto_langdial[2])
-		return csv_glotto_langdial
-	
-	# =========================================================================
-	# Filter Glottolog (Languages and Dialects) Data for Information
-	def filter_glottolog_ld_data(dialect_info_dict, csv_glotto_langdial):
-		for lang_key in dialect_info_dict.keys():
-			for entry in csv_glotto_langdial:
-				# Name in Glottolog == Input term
-				if entry[1] == lang_key:
-					dialect_info_dict[lang_key]["glottocode_ld"] = entry[0]
-					dialect_info_dict[lang_key]["isocode_ld"] = entry[2]
-					dialect_info_dict[lang_key]["level_ld"] = entry[3]
-					dialect_info_dict[lang_key]["macroarea_ld"] = entry[4]
-					dialect_info_dict[lang_key]["latitude_ld"] = entry[5]
-					dialect_info_dict[lang_key]["longitude_ld"] = entry[6]
-		return dialect_info_dict
-		""" New Information in dialect_info_dict
-		original_term, glottocode_ld, isocode_ld, level_ld, macroarea_ld, latitude_ld, longitude_ld
-		Southern Kurdish, sout2640, sdh, language, Eurasia, 32.8977, 46.5976
-		Central Kurdish, original_term2, cent1972, ckb, language, Eurasia, 35.6539, 46.5976
-		Northern Kurdish, nort2641, kmr, language, Eurasia, 37, 43
-		"""
+class ColumnTable:
 
-	# =========================================================================
-	# languages.csv
-	""" Header:
-	['ID', 'Name', 'Macroarea', 'Latitude', 'Longitude', 'Glottocode', 'ISO639P3code', 'Countries', 'Family_ID', 'Language_ID', 'Closest_ISO369P3code', 'First_Year_Of_Documentation', 'Last_Year_Of_Documentation']
-	['fuln1247', 'Fulniô', 'South America', '-9.02591', '-37.1402', 'fuln1247', 'fun', 'BR', '', '', 'fun', '', '']
-	['demm1245', 'Dem', 'Papunesia', '-3.72183', '137.632', 'demm1245', 'dem', 'ID', '', '', 'dem', '', '']
-	"""
-	# =========================================================================
-	# Read Glottolog (Languages) Data
-	def read_glottolog_l_data(input_file):
-		csv_glotto_lang = read_csv_file(input_file, '', ',', '"')
-		#print(f'Glottolog Languages:')
-		#print(csv_glotto_lang[0])
-		#print(csv_glotto_lang[1])
-		#print(csv_glotto_lang[2])
-		return csv_glotto_lang
+	def __init__(self, columns, vocabularies, groups=None):
+		# Per column: list of strings, or array of codes for coded columns
+		self.columns = columns
+		# Per column: list of the distinct values of a coded column, None otherwise
+		self.vocabularies = vocabularies
+		# Optional: value of the grouping column → (first row, row after last row) of its group
+		self.groups = groups
 
 	# =========================================================================
-	# Filter Glottolog (Languages) Data for Information
-	def filter_glottolog_l_data(dialect_info_dict, csv_glotto_lang):
-		for lang_key in dialect_info_dict.keys():
-			for entry in csv_glotto_lang:
-				# Name in Glottolog == Input term OR ID in Glottolog == above added glottocode_ld
-				# NOTE: The first case searches for names just as before, 
-				#		the second case double checks for varying orthographies via use of glottocode
-				if entry[1] == lang_key:
-					dialect_info_dict[lang_key]["id_l"] = entry[0]
-					dialect_info_dict[lang_key]["macroarea_l"] = entry[2]
-					dialect_info_dict[lang_key]["latitude_l"] = entry[3]
-					dialect_info_dict[lang_key]["longitude_l"] = entry[4]
-					dialect_info_dict[lang_key]["glottocode_l"] = entry[5]
-					dialect_info_dict[lang_key]["isocode_l"] = entry[6]
-					dialect_info_dict[lang_key]["countries_l"] = entry[7]
-					dialect_info_dict[lang_key]["familyid_l"] = entry[8]
-					dialect_info_dict[lang_key]["languageid_l"] = entry[9]
-					dialect_info_dict[lang_key]["closestisocode_l"] = entry[10]
-				elif "glottocode_ld" in dialect_info_dict[lang_key]:
-					if entry[0] == dialect_info_dict[lang_key]["glottocode_ld"]:
-						dialect_info_dict[lang_key]["id_l"] = entry[0]
-						dialect_info_dict[lang_key]["macroarea_l"] = entry[2]
-						dialect_info_dict[lang_key]["latitude_l"] = entry[3]
-						dialect_info_dict[lang_key]["longitude_l"] = entry[4]
-						dialect_info_dict[lang_key]["glottocode_l"] = entry[5]
-						dialect_info_dict[lang_key]["isocode_l"] = entry[6]
-						dialect_info_dict[lang_key]["countries_l"] = entry[7]
-						dialect_info_dict[lang_key]["familyid_l"] = entry[8]
-						dialect_info_dict[lang_key]["languageid_l"] = entry[9]
-						dialect_info_dict[lang_key]["closestisocode_l"] = entry[10]
+	# Build a table from rows, keeping the columns in keep_columns
+	@classmethod
+	def from_rows(cls, rows, keep_columns, coded_columns=(), packed_columns=(), group_column=None):
+		interned_values = {}
+		vocabulary_codes = {column_number:{} for column_number in coded_columns}
+		column_values = {column_number:[] for column_number in keep_columns}
+		group_rows = {}
+		for row_number, entry in enumerate(rows):
+			for column_number in keep_columns:
+				value = entry[column_number]
+				if column_number in vocabulary_codes:
+					codes = vocabulary_codes[column_number]
+					if value not in codes:
+						codes[value] = len(codes)
+					column_values[column_number].append(codes[value])
 				else:
-					pass
-		return dialect_info_dict
-		""" New Information in dialect_info_dict
-		original_term, id_l, macroarea_l, latitude_l, longitude_l, glottocode_l, isocode_l, countries_l, familyid_l, languageid_l, closestisocode_l
-		Southern Kurdish, sout2640, Eurasia, 32.8977, 46.5976, sout2640, sdh, IQ;IR, indo1319, , sdh
-		Central Kurdish, cent1972, Eurasia, 35.6539, 46.5976, cent1972, ckb, IQ;IR, indo1319, , ckb
-		Northern Kurdish, nort2641, Eurasia, 37, 43, nort2641, kmr, AM;AZ;IQ;IR;JO;KW;SY;TM;TR, indo1319, , kmr
-		"""
+					column_values[column_number].append(interned_values.setdefault(value, value))
+			if group_column is not None:
+				group_key = interned_values.setdefault(entry[group_column], entry[group_column])
+				if group_key in group_rows:
+					group_rows[group_key].append(row_number)
+				else:
+					group_rows[group_key] = [row_number]
+
+		# Rows of the same group are stored next to each other (in their order in the file)
+		groups = None
+		if group_column is not None:
+			row_order = []
+			groups = {}
+			for group_key, group_row_numbers in group_rows.items():
+				groups[group_key] = (len(row_order), len(row_order) + len(group_row_numbers))
+				row_order.extend(group_row_numbers)
+			for column_number in keep_columns:
+				column_values[column_number] = [column_values[column_number][row_number] for row_number in row_order]
+
+		columns = []
+		vocabularies = []
+		for column_number in keep_columns:
+			if column_number in vocabulary_codes:
+				vocabulary = list(vocabulary_codes[column_number].keys())
+				typecode = 'B' if len(vocabulary) <= 0xFF else 'H' if len(vocabulary) <= 0xFFFF else 'I'
+				columns.append(array.array(typecode, column_values[column_number]))
+				vocabularies.append(vocabulary)
+			elif column_number in packed_columns:
+				columns.append(PackedColumn.from_values(column_values[column_number]))
+				vocabularies.append(None)
+			else:
+				columns.append(column_values[column_number])
+				vocabularies.append(None)
+		return cls(columns, vocabularies, groups)
+
+	def __len__(self):
+		return len(self.columns[0])
+
+	def __getitem__(self, row_number):
+		return tuple(column[row_number] if vocabulary is None else vocabulary[column[row_number]] 
+			for column, vocabulary in zip(self.columns, self.vocabularies))
+
+	def __iter__(self):
+		for row_number in range(len(self)):
+			yield self[row_number]
+
+	# All values of one column, in the order of the rows
+	def column(self, column_number):
+		vocabulary = self.vocabularies[column_number]
+		if isinstance(self.columns[column_number], PackedColumn):
+			return [self.columns[column_number][row_number] for row_number in range(len(self))]
+		if vocabulary is None:
+			return self.columns[column_number]
+		return [vocabulary[code] for code in self.columns[column_number]]
+
+	# All rows of one group (empty if the group does not exist)
+	def group(self, group_key):
+		first_row, end_row = self.groups.get(group_key, (0, 0))
+		for row_number in range(first_row, end_row):
+			yield self[row_number]
+
+	# Plain builtins and arrays for the snapshot, so it does not depend on these classes
+	def to_state(self):
+		columns = []
+		for column in self.columns:
+			if isinstance(column, PackedColumn):
+				columns.append(("packed", column.text, column.offsets))
+			else:
+				columns.append(column)
+		return (columns, self.vocabularies, self.groups)
+
+	@classmethod
+	def from_state(cls, state):
+		columns, vocabularies, groups = state
+		for column_number, column in enumerate(columns):
+			if isinstance(column, tuple):
+				columns[column_number] = PackedColumn(column[1], column[2])
+		return cls(columns, vocabularies, groups)
 
-	
 
+"""
+===========================================================================
+Paths to Directories and Files
+===========================================================================
+"""
+# Directory of this script, the reference data is found from there (also when imported from another directory)
+script_path = os.path.dirname(os.path.abspath(__file__))
+
+# Project Files
+input_eth_countrycodes = os.path.join(script_path, 'data/ethnologue/CountryCodes.tab')
+input_eth_languagecodes = os.path.join(script_path, 'data/ethnologue/LanguageCodes.tab')
+input_eth_languageindex = os.path.join(script_path, 'data/ethnologue/LanguageIndex.tab')
+input_glo_languages = os.path.join(script_path, 'data/glottolog/languages.csv')
+input_glo_languagesanddialectsgeo = os.path.join(script_path, 'data/glottolog/languages_and_dialects_geo.csv')
+
+# Reference Data Cache (one snapshot per source)
+reference_cache_path = os.path.join(script_path, 'data/cache/reference/')
+reference_source_paths = {
+	"glottolog_ld":input_glo_languagesanddialectsgeo,
+	"glottolog_l":input_glo_languages,
+	"ethnologue_li":input_eth_languageindex,
+	"ethnologue_ci":input_eth_countrycodes,
+	"ethnologue_lc":input_eth_languagecodes
+}
+
+
+""" 
+===========================================================================
+Manually collected Data
+===========================================================================
+INPUT:	Files with the language terms to be explored:
+		.txt (one name per line), .json (structure such as in the Kurdish
+		example file) and .jsonl (one name or one dialect per line).
+OUTPUT: A list of terms associated with language varieties.
+"""
+# =========================================================================
+# Names of one line of a .jsonl file: "<name>" or {"<dialect>": {"nameOrthographies": [...]}}
+def jsonl_line_names(line):
+	line_item = json.loads(line)
+	if isinstance(line_item, str):
+		return [line_item]
+	line_names = []
+	for dialect_name in line_item.keys():
+		for dialect_name_variation in line_item[dialect_name]["nameOrthographies"]:
+			line_names.append(dialect_name_variation)
+	return line_names
+
+# =========================================================================
+# Go through all language identifying terms of the input files, one at a time
+def iter_language_names(input_path):
+
+	# List everything in the language input directory but only consider files, not subdirectories
+	input_files = glob.glob(f'{input_path}*', recursive = False)
+	input_files = [f for f in input_files if os.path.isfile(f)]
+
+	for input_file in input_files:
+		# Check extension of current file
+		file_extension = os.path.basename(input_file).split(".")[-1]
+
+		# Read from .json file (structure such as in the Kurdish example file)
+		# NOTE: A single json document can only be parsed as a whole, use .jsonl for very large inputs
+		if file_extension in ["json"]:
+			
+			# Read word list from info file
+			with open(input_file, 'r') as f:
+				logger.info(f'Reading file: {input_file}')
+				dialect_info = json.load(f)
+
+			# For each "super" item in the json
+			for dialect_name in dialect_info["dialects"].keys():
+				for dialect_name_variation in dialect_info["dialects"][dialect_name]["nameOrthographies"]:
+					yield dialect_name_variation
+
+		# Read from .jsonl file (one json value per line, empty lines are skipped)
+		elif file_extension in ["jsonl"]:
+			with open(input_file, 'r') as f:
+				logger.info(f'Reading file: {input_file}')
+				for line in f:
+					if line.strip() == '':
+						continue
+					for dialect_name in jsonl_line_names(line):
+						yield dialect_name
+
+		# Read from .txt file (one name per line)
+		elif file_extension in ["txt"]:
+
+			# Get variety name from each text line
+			with open(input_file, 'r') as f:
+				logger.info(f'Reading file: {input_file}')
+				for dialect_name in f:
+					yield dialect_name.replace('\n','')
+
+# =========================================================================
+# Go through the nameOrthographies groups of the input files (.json and .jsonl, other files have none)
+def iter_name_groups(input_path):
+	input_files = glob.glob(f'{input_path}*', recursive = False)
+	input_files = [f for f in input_files if os.path.isfile(f)]
+
+	for input_file in input_files:
+		file_extension = os.path.basename(input_file).split(".")[-1]
+		if file_extension in ["json"]:
+			with open(input_file, 'r') as f:
+				dialect_info = json.load(f)
+			for dialect_name in dialect_info["dialects"].keys():
+				yield dialect_info["dialects"][dialect_name]["nameOrthographies"]
+		elif file_extension in ["jsonl"]:
+			with open(input_file, 'r') as f:
+				for line in f:
+					if line.strip() == '':
+						continue
+					line_item = json.loads(line)
+					if isinstance(line_item, dict):
+						for dialect_name in line_item.keys():
+							yield line_item[dialect_name]["nameOrthographies"]
+
+# =========================================================================
+# Read provided list of language identifying terms
+def read_language_names(input_path):
+
+	# List of all variations of names for the found dialects
+	dialect_word_list = list(iter_language_names(input_path))
+
+	return dialect_word_list
+
+# =========================================================================
+# Read the language identifying terms in chunks of new (not yet seen) names
+def stream_language_names(input_path, chunk_size, known_names=None):
 	""" 
-	===========================================================================
-	Ethnologue Data
-	===========================================================================
-	INPUT: 	A list of terms associated with language varieties + additional data
-		   	such as ISO codes acquired in the step above.
-	OUTPUT: Additional information for each of these terms that is contained
-			in the Glottolog data, such as ISO codes used further below
+	Only the names of the current chunk and the set of names seen so far are 
+	kept in memory, repeated names are dropped as soon as they are read.
+	NOTE: This bounds the memory of parsing the input only, the caller 
+	(run_project) keeps all distinct names and their results, as the 
+	expansion and the output need all of them.
+	known_names: Set of names seen so far, updated with every name read
 	"""
+	if known_names is None:
+		known_names = set()
 
-	# =========================================================================
-	# Select already known language codes to guide exploration
-	def select_iso_codes(dialect_info_dict):
-		known_iso_codes = []
-		for lang_key in dialect_info_dict.keys():
-			lang_id = "None"
-			# If the first glottolog-query resulted in an ISO code
-			if "isocode_ld" in dialect_info_dict[lang_key]:
-				if not dialect_info_dict[lang_key]["isocode_ld"] == '':
-					lang_id = dialect_info_dict[lang_key]["isocode_ld"]
-			# If the second glottolog-query resulted in an ISO code
-			elif "isocode_l" in dialect_info_dict[lang_key]:
-				if not dialect_info_dict[lang_key]["isocode_l"] == '':
-					lang_id = dialect_info_dict[lang_key]["isocode_l"]
-			# If there was only a "closest" ISO code to be found
-			elif "closestisocode_l" in dialect_info_dict[lang_key]:
-				if not dialect_info_dict[lang_key]["closestisocode_l"] == '':
-					lang_id = dialect_info_dict[lang_key]["closestisocode_l"]
-			else:
-				pass
-				
-			known_iso_codes.append(lang_id)
-		# Debugging
-		#print(f'Currently known ISO codes: {known_iso_codes}')
-		known_iso_codes = list(set(known_iso_codes))
+	dialect_word_chunk = []
+	for dialect_name in iter_language_names(input_path):
+		if dialect_name in known_names:
+			continue
+		known_names.add(dialect_name)
+		dialect_word_chunk.append(dialect_name)
+		if len(dialect_word_chunk) >= chunk_size:
+			yield dialect_word_chunk
+			dialect_word_chunk = []
 
-		# NOTE: This check only became necessary once I used the output (35 varieties) from the German input (3 varieties)
-		if "None" in known_iso_codes:
-			known_iso_codes.remove("None")
-		print(f'Currently known unique ISO codes: {known_iso_codes}')
+	if len(dialect_word_chunk) > 0:
+		yield dialect_word_chunk
 
-		# Dictionary to hold new items from ethnologue
-		dialect_info_dict_ethno = {} 
+# =========================================================================
+# Turn a list of words into a dictionary of keys
+def word_list_to_dict(dialect_word_list):
 
-		# Fill the known ISO codes into the dictionary to start Ethnologue look-up
-		for iso_code in known_iso_codes:
-			dialect_info_dict_ethno[iso_code] = {}
+	# Dictionary to hold aggregated info about terms from word_list
+	dialect_info_dict = {} 
 
-		return dialect_info_dict_ethno
+	# Create a new item for each term in the dictionary
+	for term in dialect_word_list:
+		# These lists are later to be filled with info found
+		dialect_info_dict[term] = {}
 
+	return dialect_info_dict
 
-	# LanguageIndex.tab
-	""" Header:
-	['LangID', 'CountryID', 'NameType', 'Name']
-	['aaa', 'NG', 'L', 'Ghotuo']
-	['aaa', 'NG', 'LA', 'Otuo']
 
-	LangID, CountryID, NameType, Name
-	kmr	AM	L	Kurdish, Northern
-	kmr	AZ	L	Kurdish, Northern
-	...
-	kmr	IR	D	Northern Kurdish
+""" 
+===========================================================================
+Glottolog Data
+===========================================================================
+INPUT:  A list of terms associated with language varieties.
+OUTPUT: Additional information for each of these terms that is contained
+		in the Glottolog data, such as ISO codes used further below.
+"""
+# languages_and_dialects_geo.csv
+""" Header:
+['glottocode', 'name', 'isocodes', 'level', 'macroarea', 'latitude', 'longitude']
+['3adt1234', '3Ad-Tekles', '', 'dialect', 'Africa', '', '']
+['aala1237', 'Aalawa', '', 'dialect', 'Papunesia', '', '']
+"""
+# =========================================================================
+# Read Glottolog (Languages and Dialects) Data
+def read_glottolog_ld_data(input_file):
+	# NOTE: All 7 columns are read, level and macroarea are stored as codes, coordinates packed
+	with open(input_file, newline='') as csv_file:
+		csv_glotto_langdial = ColumnTable.from_rows(csv.reader(csv_file, delimiter=',', quotechar='"'), keep_columns=range(7), coded_columns=(3, 4), packed_columns=(5, 6))
+	#print(f'Glottolog Languages and Dialects:')
+	#print(csv_glotto_langdial[0])
+	#print(csv_glotto_langdial[1])
+	#print(csv_glotto_langdial[2])
+	return csv_glotto_langdial
+
+# =========================================================================
+# Index Glottolog (Languages and Dialects) Data by name
+def index_glottolog_ld_data(csv_glotto_langdial):
+	# Name in Glottolog → number of the row holding it
+	# NOTE: Later rows overwrite earlier ones, so the last matching row wins
+	#		just like it did when scanning all rows for every input term.
+	name_index = {}
+	for row_number, lang_name in enumerate(csv_glotto_langdial.column(1)):
+		name_index[lang_name] = row_number
+	return name_index
+
+# =========================================================================
+# Add the information of a row of languages_and_dialects_geo.csv to the information of a variety
+def add_glottolog_ld_information(lang_info, entry):
+	lang_info["glottocode_ld"] = entry[0]
+	lang_info["isocode_ld"] = entry[2]
+	lang_info["level_ld"] = entry[3]
+	lang_info["macroarea_ld"] = entry[4]
+	lang_info["latitude_ld"] = entry[5]
+	lang_info["longitude_ld"] = entry[6]
+
+# =========================================================================
+# Filter Glottolog (Languages and Dialects) Data for Information
+def filter_glottolog_ld_data(dialect_info_dict, csv_glotto_langdial, name_index, name_matching=None):
+	for lang_key in dialect_info_dict.keys():
+		# Name in Glottolog == Input term
+		if lang_key in name_index:
+			entry = csv_glotto_langdial[name_index[lang_key]]
+			if name_matching is not None:
+				dialect_info_dict[lang_key]["match_method_ld"] = "exact"
+				dialect_info_dict[lang_key]["match_score_ld"] = 1.0
+		# Name in Glottolog ≈ Input term (only with --match normalized or fuzzy)
+		elif name_matching is not None:
+			row_number, match_method, match_score = match_name(name_matching, lang_key, 0)
+			if row_number < 0:
+				continue
+			entry = csv_glotto_langdial[row_number]
+			dialect_info_dict[lang_key]["match_method_ld"] = match_method
+			dialect_info_dict[lang_key]["match_score_ld"] = match_score
+		else:
+			continue
+		add_glottolog_ld_information(dialect_info_dict[lang_key], entry)
+	return dialect_info_dict
+	""" New Information in dialect_info_dict
+	original_term, glottocode_ld, isocode_ld, level_ld, macroarea_ld, latitude_ld, longitude_ld
+	Southern Kurdish, sout2640, sdh, language, Eurasia, 32.8977, 46.5976
+	Central Kurdish, original_term2, cent1972, ckb, language, Eurasia, 35.6539, 46.5976
+	Northern Kurdish, nort2641, kmr, language, Eurasia, 37, 43
 	"""
-	# =========================================================================
-	# Read Ethnologue (Language Index) Data
-	def read_ethnologue_li(input_eth_languageindex):
-		csv_ethno_langindex = read_csv_file(input_eth_languageindex, '', '\t', '"')
-		#print(f'Ethnologue Language Index:')
-		#print(csv_ethno_langindex[0])
-		#print(csv_ethno_langindex[1])
-		#print(csv_ethno_langindex[2])
-		return csv_ethno_langindex
-		
-	# =========================================================================
-	# Filter Ethnologue (Language Index) Data
-	def filter_ethnologue_li(dialect_info_dict_ethno, csv_ethno_langindex):
-		for iso_code in dialect_info_dict_ethno.keys():
-			for entry in csv_ethno_langindex:
-				# For each entry in the ethno_language_index data
-				if entry[0] == iso_code:
-					# Item for each language name to hold the CountryID and NameType
-					#lang_iso = entry[0]
-					lang_country = entry[1]
-					lang_type = entry[2]
-					lang_name = entry[3]
-					
-					# Simply add new information if item for this Name already exists
-					if lang_name in dialect_info_dict_ethno[iso_code]:
-						dialect_info_dict_ethno[iso_code][lang_name][lang_country] = lang_type
-					
-					# Create new item with Name from entry if not exists
-					else:
-						dialect_info_dict_ethno[iso_code][lang_name] = {}
-						dialect_info_dict_ethno[iso_code][lang_name][lang_country] = lang_type
-		return dialect_info_dict_ethno
-		""" New Information in dialect_info_dict_ethno
-		"kmr":{
-			"Kurdish, Northern": {
-				"AM":"L",
-				"AZ":"L", ...
-			}, ...
-		},
-		"ckb": {
-			"Kurdish, Central": {
-				"IQ":"L", ...
-			}, ...
-		}, ...
-		"""
 
+# =========================================================================
+# languages.csv
+""" Header:
+['ID', 'Name', 'Macroarea', 'Latitude', 'Longitude', 'Glottocode', 'ISO639P3code', 'Countries', 'Family_ID', 'Language_ID', 'Closest_ISO369P3code', 'First_Year_Of_Documentation', 'Last_Year_Of_Documentation']
+['fuln1247', 'Fulniô', 'South America', '-9.02591', '-37.1402', 'fuln1247', 'fun', 'BR', '', '', 'fun', '', '']
+['demm1245', 'Dem', 'Papunesia', '-3.72183', '137.632', 'demm1245', 'dem', 'ID', '', '', 'dem', '', '']
+"""
+# =========================================================================
+# Read Glottolog (Languages) Data
+def read_glottolog_l_data(input_file):
+	# NOTE: Only the first 11 columns are read (not the years of documentation), 
+	#		macroarea, countries, family and language ID are stored as codes, coordinates packed
+	with open(input_file, newline='') as csv_file:
+		csv_glotto_lang = ColumnTable.from_rows(csv.reader(csv_file, delimiter=',', quotechar='"'), keep_columns=range(11), coded_columns=(2, 7, 8, 9), packed_columns=(3, 4))
+	#print(f'Glottolog Languages:')
+	#print(csv_glotto_lang[0])
+	#print(csv_glotto_lang[1])
+	#print(csv_glotto_lang[2])
+	return csv_glotto_lang
+
+# =========================================================================
+# Index Glottolog (Languages) Data by name and by ID
+def index_glottolog_l_data(csv_glotto_lang):
+	# Name in Glottolog → number of the (last) row holding it
+	name_index = {}
+	# ID in Glottolog → number of the (last) row holding it
+	id_index = {}
+	for row_number, (lang_id, lang_name) in enumerate(zip(csv_glotto_lang.column(0), csv_glotto_lang.column(1))):
+		name_index[lang_name] = row_number
+		id_index[lang_id] = row_number
+	return name_index, id_index
+
+# =========================================================================
+# Index the Glottolog (Languages) hierarchy: dialects below their Language_ID, languages below their Family_ID
+# NOTE: Nodes are numbered depth first, so the descendants of a node are the slice order[start + 1:end]
+def index_glottolog_l_hierarchy(csv_glotto_lang):
+	parents = {}
+	children = {}
+	# NOTE: The header row is left out
+	for lang_id, family_id, language_id in itertools.islice(zip(csv_glotto_lang.column(0), csv_glotto_lang.column(8), csv_glotto_lang.column(9)), 1, None):
+		parent_id = language_id if language_id != '' else family_id
+		if parent_id == '' or parent_id == lang_id:
+			continue
+		parents[lang_id] = parent_id
+		if parent_id in children:
+			children[parent_id].append(lang_id)
+		else:
+			children[parent_id] = [lang_id]
+
+	order = []
+	intervals = {}
+	for root_id in itertools.islice(csv_glotto_lang.column(0), 1, None):
+		if root_id in parents or root_id in intervals:
+			continue
+		# Depth first without recursion: (node, False) enters a node, (node, True) leaves it
+		stack = [(root_id, False)]
+		while len(stack) > 0:
+			node_id, leaving = stack.pop()
+			if leaving:
+				intervals[node_id] = (intervals[node_id], len(order))
+				continue
+			if node_id in intervals:
+				continue
+			intervals[node_id] = len(order)
+			order.append(node_id)
+			stack.append((node_id, True))
+			for child_id in reversed(children.get(node_id, [])):
+				stack.append((child_id, False))
+	glotto_lang_hierarchy = {
+		"parents":parents,
+		"order":order,
+		"intervals":intervals
+	}
+	return glotto_lang_hierarchy
+
+# =========================================================================
+# Index Glottolog (Languages) Data the other way round: country, ISO code, macroarea and level → row numbers
+# NOTE: Dialects have no ISO639P3code of their own, they are found by Closest_ISO369P3code
+def index_glottolog_l_reverse(csv_glotto_lang):
+	glotto_lang_reverse = {"country":{}, "iso":{}, "macroarea":{}, "level":{}}
+	# NOTE: Families (such as indo1319) are rows of their own, but neither languages nor dialects, so they are left out
+	#		Dialects of an isolate (such as Basque) have it as Family_ID and Language_ID, so it is kept as language
+	family_ids = set(itertools.islice(csv_glotto_lang.column(8), 1, None))
+	family_ids.difference_update(itertools.islice(csv_glotto_lang.column(9), 1, None))
+	# NOTE: The header row is left out
+	for row_number in range(1, len(csv_glotto_lang)):
+		entry = csv_glotto_lang[row_number]
+		if entry[0] in family_ids:
+			continue
+		index_keys = [("iso", entry[10]), ("macroarea", entry[2]), ("level", "dialect" if entry[9] != '' else "language")]
+		index_keys.extend(("country", country_id) for country_id in entry[7].split(';'))
+		for index_name, index_key in index_keys:
+			if index_key == '':
+				continue
+			if index_key not in glotto_lang_reverse[index_name]:
+				glotto_lang_reverse[index_name][index_key] = array.array('I')
+			glotto_lang_reverse[index_name][index_key].append(row_number)
+	return glotto_lang_reverse
+
+# =========================================================================
+# Add the information of a row of languages.csv to the information of a variety
+def add_glottolog_l_information(lang_info, entry):
+	lang_info["id_l"] = entry[0]
+	lang_info["macroarea_l"] = entry[2]
+	lang_info["latitude_l"] = entry[3]
+	lang_info["longitude_l"] = entry[4]
+	lang_info["glottocode_l"] = entry[5]
+	lang_info["isocode_l"] = entry[6]
+	lang_info["countries_l"] = entry[7]
+	lang_info["familyid_l"] = entry[8]
+	lang_info["languageid_l"] = entry[9]
+	lang_info["closestisocode_l"] = entry[10]
+
+# =========================================================================
+# Filter Glottolog (Languages) Data for Information
+def filter_glottolog_l_data(dialect_info_dict, csv_glotto_lang, name_index, id_index, name_matching=None):
+	for lang_key in dialect_info_dict.keys():
+		# Name in Glottolog == Input term OR ID in Glottolog == above added glottocode_ld
+		# NOTE: The first case searches for names just as before, 
+		#		the second case double checks for varying orthographies via use of glottocode
+		# NOTE: Both cases may match different rows, the later one in the file wins.
+		row_number = name_index.get(lang_key, -1)
+		name_found = row_number >= 0
+		if "glottocode_ld" in dialect_info_dict[lang_key]:
+			row_number = max(row_number, id_index.get(dialect_info_dict[lang_key]["glottocode_ld"], -1))
+		if name_matching is not None:
+			if name_found:
+				match_method, match_score = "exact", 1.0
+			# NOTE: Found through the glottocode only, so the row is as good as the match in languages_and_dialects_geo.csv
+			elif row_number >= 0:
+				match_method = dialect_info_dict[lang_key].get("match_method_ld", "exact")
+				match_score = dialect_info_dict[lang_key].get("match_score_ld", 1.0)
+			# Name in Glottolog ≈ Input term (only with --match normalized or fuzzy)
+			else:
+				row_number, match_method, match_score = match_name(name_matching, lang_key, 1)
+			if row_number >= 0:
+				dialect_info_dict[lang_key]["match_method_l"] = match_method
+				dialect_info_dict[lang_key]["match_score_l"] = match_score
+		if row_number < 0:
+			continue
+		add_glottolog_l_information(dialect_info_dict[lang_key], csv_glotto_lang[row_number])
+	return dialect_info_dict
+	""" New Information in dialect_info_dict
+	original_term, id_l, macroarea_l, latitude_l, longitude_l, glottocode_l, isocode_l, countries_l, familyid_l, languageid_l, closestisocode_l
+	Southern Kurdish, sout2640, Eurasia, 32.8977, 46.5976, sout2640, sdh, IQ;IR, indo1319, , sdh
+	Central Kurdish, cent1972, Eurasia, 35.6539, 46.5976, cent1972, ckb, IQ;IR, indo1319, , ckb
+	Northern Kurdish, nort2641, Eurasia, 37, 43, nort2641, kmr, AM;AZ;IQ;IR;JO;KW;SY;TM;TR, indo1319, , kmr
+	"""
 
-	
-	""" 
-	dialect_info_dict = {
-		"Central Kurdish": {
-			"key":"item", ...
-		},
-		"Sorani": {
-			"key":"item", ...
-		}, ...
+
+
+""" 
+===========================================================================
+Name Matching
+===========================================================================
+INPUT:	Terms without an exact match in the Glottolog data.
+OUTPUT: The closest Glottolog name (--match normalized or fuzzy), together
+		with the method and score of the match (match_method_*, match_score_*).
+		- normalized: Same name after folding diacritics, case and punctuation 
+					  and inverting Ethnologue names ("Kurdish, Northern")
+		- fuzzy: Most similar normalized name by shared character trigrams,
+				 if the similarity reaches --match-threshold
+"""
+# =========================================================================
+# Normalize a name for matching: "Kurdish, Northern" → "northern kurdish", "Soranî" → "sorani"
+def normalize_name(name):
+	# Inverted names as used by Ethnologue
+	if name.count(',') == 1:
+		name_head, name_tail = name.split(',')
+		name = f'{name_tail} {name_head}'
+	return fold_name(name)
+
+# =========================================================================
+# Fold diacritics, case and punctuation: "Soranî" → "sorani", "Kurdish, Northern" → "kurdish northern"
+def fold_name(name):
+	# Split letters from their diacritics and drop the diacritics
+	name = unicodedata.normalize('NFKD', name)
+	name = ''.join(character for character in name if not unicodedata.combining(character))
+	# Case and punctuation
+	name = ''.join(character if character.isalnum() else ' ' for character in name.casefold())
+	return ' '.join(name.split())
+
+# =========================================================================
+# Character trigrams of a normalized name (padded, so short names have trigrams too)
+def name_trigrams(normalized_name):
+	padded_name = f'  {normalized_name} '
+	return set(padded_name[position:position + 3] for position in range(len(padded_name) - 2))
+
+# =========================================================================
+# Index the normalized names of both Glottolog tables
+def index_name_matching(csv_glotto_langdial, csv_glotto_lang):
+	# Normalized name → [row in languages_and_dialects_geo.csv, row in languages.csv] (-1: not in this table)
+	# NOTE: As for the exact names, the last row with the same normalized name wins
+	normalized_rows = {}
+	for table_number, csv_table in enumerate([csv_glotto_langdial, csv_glotto_lang]):
+		# First row of each table is its header
+		lang_names = csv_table.column(1)
+		for row_number in range(1, len(lang_names)):
+			normalized_name = normalize_name(lang_names[row_number])
+			if normalized_name not in normalized_rows:
+				normalized_rows[normalized_name] = [-1, -1]
+			normalized_rows[normalized_name][table_number] = row_number
+
+	# Trigram → numbers of the normalized names containing it
+	normalized_names = list(normalized_rows.keys())
+	trigram_counts = []
+	trigram_index = {}
+	for name_number, normalized_name in enumerate(normalized_names):
+		current_trigrams = name_trigrams(normalized_name)
+		trigram_counts.append(len(current_trigrams))
+		for trigram in current_trigrams:
+			if trigram in trigram_index:
+				trigram_index[trigram].append(name_number)
+			else:
+				trigram_index[trigram] = [name_number]
+
+	name_match_index = {
+		"normalized_rows":normalized_rows,
+		"normalized_names":normalized_names,
+		"trigram_counts":trigram_counts,
+		"trigram_index":trigram_index
+	}
+	return name_match_index
+
+# =========================================================================
+# Index for name matching, built on first use and kept with the reference tables (not in the snapshot)
+def get_name_match_index(reference_tables):
+	if "name_match_index" not in reference_tables:
+		with profile_stage("name_match_index"):
+			reference_tables["name_match_index"] = index_name_matching(reference_tables["csv_glotto_langdial"], reference_tables["csv_glotto_lang"])
+	return reference_tables["name_match_index"]
+
+# =========================================================================
+# Settings for name matching, None if only exact names are matched
+# max_candidates: Number of input terms whose candidates are kept (0: all), the least recently used are dropped first
+def prepare_name_matching(reference_tables, match_mode="exact", match_threshold=0.8, max_candidates=0):
+	if match_mode == "exact":
+		return None
+	name_matching = {
+		"mode":match_mode,
+		"threshold":match_threshold,
+		# NOTE: The index is only built once a term actually needs it
+		"reference_tables":reference_tables,
+		# Normalized input term → candidates, shared by both Glottolog passes (in order of last use)
+		"candidates":{},
+		"max_candidates":max_candidates,
+		# NOTE: The lookup service and DialectOntology may match names in several threads at once
+		"candidates_lock":threading.Lock()
 	}
+	return name_matching
+
+# =========================================================================
+# Find the most similar normalized names by their shared trigrams
+def fuzzy_name_candidates(name_match_index, normalized_name, match_threshold):
+	query_trigrams = name_trigrams(normalized_name)
+	shared_trigrams = {}
+	for trigram in query_trigrams:
+		for name_number in name_match_index["trigram_index"].get(trigram, ()):
+			shared_trigrams[name_number] = shared_trigrams.get(name_number, 0) + 1
+
+	# Dice coefficient of the two trigram sets
+	fuzzy_candidates = []
+	for name_number, shared_count in shared_trigrams.items():
+		match_score = 2 * shared_count / (len(query_trigrams) + name_match_index["trigram_counts"][name_number])
+		if match_score >= match_threshold:
+			fuzzy_candidates.append((match_score, name_match_index["normalized_names"][name_number]))
+	# Best score first, ties are resolved by name so every run picks the same one
+	fuzzy_candidates.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+	return fuzzy_candidates
+
+# =========================================================================
+# Match a term without exact match in one of the Glottolog tables (0: languages_and_dialects_geo.csv, 1: languages.csv)
+def match_name(name_matching, lang_key, table_number):
+	name_match_index = get_name_match_index(name_matching["reference_tables"])
+	normalized_name = normalize_name(lang_key)
+	with name_matching["candidates_lock"]:
+		# NOTE: Taken out and put back, so the most recently used candidates are last
+		match_candidates = name_matching["candidates"].pop(normalized_name, None)
+	if match_candidates is None:
+		match_candidates = []
+		if normalized_name in name_match_index["normalized_rows"]:
+			match_candidates.append(("normalized", 1.0, normalized_name))
+		if name_matching["mode"] == "fuzzy":
+			for match_score, candidate_name in fuzzy_name_candidates(name_match_index, normalized_name, name_matching["threshold"]):
+				if candidate_name != normalized_name:
+					match_candidates.append(("fuzzy", round(match_score, 4), candidate_name))
+	with name_matching["candidates_lock"]:
+		name_matching["candidates"][normalized_name] = match_candidates
+		if name_matching["max_candidates"] > 0:
+			while len(name_matching["candidates"]) > name_matching["max_candidates"]:
+				del name_matching["candidates"][next(iter(name_matching["candidates"]))]
+
+	# First candidate that occurs in the requested table
+	for match_method, match_score, candidate_name in match_candidates:
+		row_number = name_match_index["normalized_rows"][candidate_name][table_number]
+		if row_number >= 0:
+			return row_number, match_method, match_score
+	return -1, None, 0.0
 
-	dialect_info_dict_ethno_country = {
-		"hac": {
-			"Kakai": {
-				"IQ": "D"
-			}.
-			"Zengana": {
-				"IQ": "D"
-			}, ...
-		},
-		"kmr": {
-			"Kurdish, Northern": {
-				"AM": "L", ...
-			}, ...
-		}, ...
+
+""" 
+===========================================================================
+Name Completion
+===========================================================================
+INPUT:	A prefix typed by a user, e.g. "sor" or "Kurdî".
+OUTPUT: The first k names (with glottocode and ISO code) of all names in 
+		languages_and_dialects_geo.csv, languages.csv and LanguageIndex.tab
+		starting with this prefix, ignoring diacritics, case and punctuation.
+		The folded names are kept in one sorted list, a completion is a 
+		binary search followed by reading the next k entries.
+		The index can be exported (--export-completion) as compact json
+		for the frontend: parallel lists sorted by the folded names, so 
+		the same binary search works there.
+"""
+# =========================================================================
+# Index all names of the reference data for completion
+def index_name_completion(csv_glotto_langdial, csv_glotto_lang, ethno_langindex):
+	completion_entries = set()
+	# NOTE: The header rows are left out
+	for row_number in range(1, len(csv_glotto_langdial)):
+		entry = csv_glotto_langdial[row_number]
+		completion_entries.add((entry[1], entry[0], entry[2]))
+	# ISO code → glottocode, for the Ethnologue names
+	iso_glottocodes = {}
+	for row_number in range(1, len(csv_glotto_lang)):
+		entry = csv_glotto_lang[row_number]
+		completion_entries.add((entry[1], entry[0], entry[6]))
+		if entry[6] != '':
+			iso_glottocodes[entry[6]] = entry[0]
+	for lang_id in ethno_langindex.groups.keys():
+		if lang_id == "LangID":
+			continue
+		for lang_country, lang_type, lang_name in ethno_langindex.group(lang_id):
+			completion_entries.add((lang_name, iso_glottocodes.get(lang_id, ''), lang_id))
+
+	# Sorted by folded name, then by name and codes so every run gives the same order
+	completion_entries = sorted((fold_name(lang_name), lang_name, glottocode, iso_code) for lang_name, glottocode, iso_code in completion_entries)
+	completion_index = {
+		"keys":[completion_entry[0] for completion_entry in completion_entries],
+		"names":[completion_entry[1] for completion_entry in completion_entries],
+		"glottocodes":[completion_entry[2] for completion_entry in completion_entries],
+		"isoCodes":[completion_entry[3] for completion_entry in completion_entries]
 	}
-	"""
+	return completion_index
+
+# =========================================================================
+# Index for completion, built once it is first needed
+def get_completion_index(reference_tables):
+	if "completion_index" not in reference_tables:
+		with profile_stage("completion_index"):
+			reference_tables["completion_index"] = index_name_completion(reference_tables["csv_glotto_langdial"], reference_tables["csv_glotto_lang"], reference_tables["ethno_langindex"])
+	return reference_tables["completion_index"]
+
+# =========================================================================
+# First k names starting with the prefix (shorter names first, as they sort before their extensions)
+def complete_name(completion_index, prefix, k=10):
+	folded_prefix = fold_name(prefix)
+	completions = []
+	completion_keys = completion_index["keys"]
+	entry_number = bisect.bisect_left(completion_keys, folded_prefix)
+	while entry_number < len(completion_keys) and len(completions) < k and completion_keys[entry_number].startswith(folded_prefix):
+		completions.append({
+			"name":completion_index["names"][entry_number],
+			"glottocode":completion_index["glottocodes"][entry_number],
+			"iso639":completion_index["isoCodes"][entry_number]
+		})
+		entry_number += 1
+	return completions
+
+# =========================================================================
+# Write the index for the frontend (json without whitespace)
+def export_completion_index(output_file, reference_tables):
+	completion_index = get_completion_index(reference_tables)
+	completion_export = {
+		"version":reference_tables["version"],
+		# NOTE: Names are folded as in fold_name: NFKD without combining marks, casefolded, punctuation → single spaces
+		"folding":"nfkd-nomarks-casefold-alnum",
+		"keys":completion_index["keys"],
+		"names":completion_index["names"],
+		"glottocodes":completion_index["glottocodes"],
+		"isoCodes":completion_index["isoCodes"]
+	}
+	output_written = write_json_file(output_file, completion_export, "compact")
+	logger.info(f'Completion index: {len(completion_index["keys"])} names exported to {output_file}' + ('' if output_written else ' (unchanged)'))
+	return output_written
 
-	# =========================================================================
-	# Filter Ethnologue Names and Original Names to find new Language Names
-	def filter_ethno_new(dialect_word_list, dialect_info_dict_ethno_country):
-		known_lang_names = dialect_word_list
-		#print(f'Known Language Names: {known_lang_names}')
-		#for lang_name in dialect_info_dict.keys():
-		#	known_lang_names.append(lang_name)
-
-		new_lang_names = []
-		for iso_code in dialect_info_dict_ethno_country.keys():
-			for lang_name in dialect_info_dict_ethno_country[iso_code].keys():
-				new_lang_names.append(lang_name)
-		
-		# Keep unique names and remove already known names
-		new_lang_names = list(set(new_lang_names))
-		for known_name in known_lang_names:
-			if known_name in new_lang_names:
-				new_lang_names.remove(known_name)
 
-		return new_lang_names
+""" 
+===========================================================================
+Spatial Index
+===========================================================================
+INPUT:	The coordinates in languages_and_dialects_geo.csv and languages.csv.
+OUTPUT: A grid of 1° × 1° cells over all varieties with coordinates, used to
+		find the varieties within a radius (--near-radius) or the nearest 
+		varieties (--near-k) of each resolved variety without scanning the
+		tables. The coordinates of languages.csv are preferred, as in the 
+		output dialect dictionary.
+"""
+# NOTE: Cells of one degree are about 111 km high, so a radius of a few hundred km reads few cells
+spatial_cell_size = 1.0
+earth_radius_km = 6371.0
+
+# =========================================================================
+# Latitude and longitude as numbers, None if missing or invalid
+def parse_coordinates(latitude, longitude):
+	try:
+		return float(latitude), float(longitude)
+	except ValueError:
+		return None
+
+# =========================================================================
+# Grid over all varieties with coordinates (the header rows are left out)
+def index_spatial_data(csv_glotto_langdial, csv_glotto_lang):
+	# Glottocode → (name, latitude, longitude), languages.csv last so its coordinates are kept
+	variety_points = {}
+	# Glottocode → number of the (last) row holding it in each table
+	langdial_rows = {}
+	lang_rows = {}
+	for row_number, (glottocode, name, latitude, longitude) in enumerate(zip(csv_glotto_langdial.column(0), csv_glotto_langdial.column(1), csv_glotto_langdial.column(5), csv_glotto_langdial.column(6))):
+		langdial_rows[glottocode] = row_number
+		coordinates = parse_coordinates(latitude, longitude)
+		if coordinates is not None:
+			variety_points[glottocode] = (name, coordinates[0], coordinates[1])
+	for row_number, (glottocode, name, latitude, longitude) in enumerate(zip(csv_glotto_lang.column(5), csv_glotto_lang.column(1), csv_glotto_lang.column(3), csv_glotto_lang.column(4))):
+		lang_rows[glottocode] = row_number
+		coordinates = parse_coordinates(latitude, longitude)
+		if coordinates is not None and glottocode != '':
+			variety_points[glottocode] = (name, coordinates[0], coordinates[1])
+	# NOTE: Parsing the header rows fails, so they are never part of the index
+
+	spatial_index = {
+		"glottocodes":[],
+		"names":[],
+		# Rows of the point in languages_and_dialects_geo.csv and languages.csv (-1: not in this table)
+		"langdial_rows":array.array('i'),
+		"lang_rows":array.array('i'),
+		"latitudes":array.array('d'),
+		"longitudes":array.array('d'),
+		# NOTE: Radians and cosines are kept as well, so a query only needs two sines per point
+		"latitudes_radians":array.array('d'),
+		"longitudes_radians":array.array('d'),
+		"latitude_cosines":array.array('d'),
+		# (latitude cell, longitude cell) → numbers of the points in this cell
+		"cells":{}
+	}
+	for point_number, (glottocode, (name, latitude, longitude)) in enumerate(variety_points.items()):
+		spatial_index["glottocodes"].append(glottocode)
+		spatial_index["names"].append(name)
+		spatial_index["langdial_rows"].append(langdial_rows.get(glottocode, -1))
+		spatial_index["lang_rows"].append(lang_rows.get(glottocode, -1))
+		spatial_index["latitudes"].append(latitude)
+		spatial_index["longitudes"].append(longitude)
+		spatial_index["latitudes_radians"].append(math.radians(latitude))
+		spatial_index["longitudes_radians"].append(math.radians(longitude))
+		spatial_index["latitude_cosines"].append(math.cos(math.radians(latitude)))
+		cell = (math.floor(latitude / spatial_cell_size), math.floor(longitude / spatial_cell_size))
+		if cell in spatial_index["cells"]:
+			spatial_index["cells"][cell].append(point_number)
+		else:
+			spatial_index["cells"][cell] = [point_number]
+	return spatial_index
+
+# =========================================================================
+# Spatial index, built on first use and kept with the reference tables (not in the snapshot)
+def get_spatial_index(reference_tables):
+	if "spatial_index" not in reference_tables:
+		with profile_stage("spatial_index"):
+			reference_tables["spatial_index"] = index_spatial_data(reference_tables["csv_glotto_langdial"], reference_tables["csv_glotto_lang"])
+	return reference_tables["spatial_index"]
+
+# =========================================================================
+# Points within radius_km of a location: list of (great-circle distance in km, point number), nearest first
+def points_within_radius(spatial_index, latitude, longitude, radius_km):
+	latitude_span = math.degrees(radius_km / earth_radius_km)
+	first_latitude_cell = math.floor(max(-90.0, latitude - latitude_span) / spatial_cell_size)
+	last_latitude_cell = math.floor(min(90.0, latitude + latitude_span) / spatial_cell_size)
+	# Longitude degrees get shorter towards the poles, all longitudes are read near a pole
+	highest_latitude = min(90.0, abs(latitude) + latitude_span)
+	if highest_latitude >= 89.0 or radius_km >= earth_radius_km:
+		longitude_cells = range(math.floor(-180.0 / spatial_cell_size), math.floor(180.0 / spatial_cell_size) + 1)
+	else:
+		longitude_span = latitude_span / math.cos(math.radians(highest_latitude))
+		if longitude_span >= 180.0:
+			longitude_cells = range(math.floor(-180.0 / spatial_cell_size), math.floor(180.0 / spatial_cell_size) + 1)
+		else:
+			longitude_cells = range(math.floor((longitude - longitude_span) / spatial_cell_size), math.floor((longitude + longitude_span) / spatial_cell_size) + 1)
+
+	cells_per_circle = round(360.0 / spatial_cell_size)
+	first_longitude_cell = math.floor(-180.0 / spatial_cell_size)
+	visited_longitude_cells = set()
+	found_points = []
+	# Points are compared by the haversine term, the distance is only computed for points within the radius
+	cells = spatial_index["cells"]
+	latitudes_radians = spatial_index["latitudes_radians"]
+	longitudes_radians = spatial_index["longitudes_radians"]
+	latitude_cosines = spatial_index["latitude_cosines"]
+	latitude_radians = math.radians(latitude)
+	longitude_radians = math.radians(longitude)
+	latitude_cosine = math.cos(latitude_radians)
+	max_haversine = math.sin(min(radius_km / earth_radius_km, math.pi) / 2)**2
+	for longitude_cell in longitude_cells:
+		# Cells beyond ±180° continue on the other side
+		longitude_cell = (longitude_cell - first_longitude_cell) % cells_per_circle + first_longitude_cell
+		if longitude_cell in visited_longitude_cells:
+			continue
+		visited_longitude_cells.add(longitude_cell)
+		for latitude_cell in range(first_latitude_cell, last_latitude_cell + 1):
+			for point_number in cells.get((latitude_cell, longitude_cell), ()):
+				haversine = math.sin((latitudes_radians[point_number] - latitude_radians) / 2)**2 + latitude_cosine * latitude_cosines[point_number] * math.sin((longitudes_radians[point_number] - longitude_radians) / 2)**2
+				if haversine <= max_haversine:
+					found_points.append((2 * earth_radius_km * math.asin(min(1.0, math.sqrt(haversine))), point_number))
+	found_points.sort()
+	return found_points
+
+# =========================================================================
+# The k nearest points of a location (within max_radius_km if given): list of (distance, point number)
+# NOTE: The search radius is doubled until enough points are found, points of skip_glottocode are left out before
+def nearest_points(spatial_index, latitude, longitude, k, max_radius_km=0, skip_glottocode=None):
+	search_radius_km = 100.0
+	half_circumference_km = math.pi * earth_radius_km
+	while True:
+		if max_radius_km > 0:
+			search_radius_km = min(search_radius_km, max_radius_km)
+		found_points = points_within_radius(spatial_index, latitude, longitude, search_radius_km)
+		if skip_glottocode is not None:
+			found_points = [found_point for found_point in found_points if spatial_index["glottocodes"][found_point[1]] != skip_glottocode]
+		if len(found_points) >= k or search_radius_km >= half_circumference_km or (max_radius_km > 0 and search_radius_km >= max_radius_km):
+			return found_points[:k]
+		search_radius_km *= 2
+
+# =========================================================================
+# Coordinates of a resolved variety (those of languages.csv preferred, as in the output)
+def variety_coordinates(lang_info):
+	for latitude_key, longitude_key in [("latitude_l", "longitude_l"), ("latitude_ld", "longitude_ld")]:
+		if latitude_key in lang_info:
+			coordinates = parse_coordinates(lang_info[latitude_key], lang_info[longitude_key])
+			if coordinates is not None:
+				return coordinates
+	return None
+
+# =========================================================================
+# Varieties near the resolved varieties: name → {"near_to_geo":..., "distance_km_geo":..., "point_geo":...}
+# NOTE: Names already in dialect_info_dict are not added again, each name is kept for its nearest variety
+#		(point_geo is the point of this variety, as names are not unique in Glottolog)
+def find_nearby_varieties(dialect_info_dict, reference_tables, radius_km=0, k=0):
+	spatial_index = get_spatial_index(reference_tables)
+	nearby_varieties = {}
+	for lang_key in dialect_info_dict.keys():
+		coordinates = variety_coordinates(dialect_info_dict[lang_key])
+		if coordinates is None:
+			continue
+		# NOTE: The variety itself is not near to itself (if it has a point at all)
+		lang_glottocode = dialect_info_dict[lang_key].get("id_l") or dialect_info_dict[lang_key].get("glottocode_ld")
+		if k > 0:
+			found_points = nearest_points(spatial_index, coordinates[0], coordinates[1], k, radius_km, lang_glottocode)
+		else:
+			found_points = [found_point for found_point in points_within_radius(spatial_index, coordinates[0], coordinates[1], radius_km) if spatial_index["glottocodes"][found_point[1]] != lang_glottocode]
+		if profile_metrics is not None:
+			count_metric("proximity", "queries")
+			count_metric("proximity", "points_found", len(found_points))
+		for point_distance, point_number in found_points:
+			point_name = spatial_index["names"][point_number]
+			if point_name in dialect_info_dict:
+				continue
+			if point_name in nearby_varieties and nearby_varieties[point_name]["distance_km_geo"] <= round(point_distance, 3):
+				continue
+			nearby_varieties[point_name] = {
+				"near_to_geo":lang_key,
+				"distance_km_geo":round(point_distance, 3),
+				"point_geo":point_number
+			}
+	return nearby_varieties
+
+# =========================================================================
+# Glottolog information of the nearby varieties, taken from the rows of their points (not looked up by name again)
+def resolve_nearby_varieties(nearby_varieties, reference_tables):
+	spatial_index = get_spatial_index(reference_tables)
+	csv_glotto_langdial = reference_tables["csv_glotto_langdial"]
+	csv_glotto_lang = reference_tables["csv_glotto_lang"]
+	dialect_info_dict_nearby = {}
+	for lang_key in nearby_varieties.keys():
+		point_number = nearby_varieties[lang_key]["point_geo"]
+		lang_info = {}
+		if spatial_index["langdial_rows"][point_number] >= 0:
+			add_glottolog_ld_information(lang_info, csv_glotto_langdial[spatial_index["langdial_rows"][point_number]])
+		if spatial_index["lang_rows"][point_number] >= 0:
+			add_glottolog_l_information(lang_info, csv_glotto_lang[spatial_index["lang_rows"][point_number]])
+		lang_info["near_to_geo"] = nearby_varieties[lang_key]["near_to_geo"]
+		lang_info["distance_km_geo"] = nearby_varieties[lang_key]["distance_km_geo"]
+		dialect_info_dict_nearby[lang_key] = lang_info
+	return dialect_info_dict_nearby
 
 
-	# CountryCodes.tab
-	""" Header:
-	['CountryID', 'Name', 'Area']
-	['AD', 'Andorra', 'Europe']
-	['AE', 'United Arab Emirates', 'Asia']
-	"""
-	# =========================================================================
-	# Read Ethnologue (Country ID) Data
-	def read_etnologue_ci(input_eth_countrycodes):
-		csv_ethno_country = read_csv_file(input_eth_countrycodes, '', '\t', '"')
-		#print(f'Ethnologue Country Codes:')
-		#print(csv_ethno_country[0])
-		#print(csv_ethno_country[1])
-		#print(csv_ethno_country[2])
-		return csv_ethno_country
-		"""
-		CountryID, Name, Area
-		IR	Iran	Asia
-		SY	Syria	Asia
-		"""
-	
+""" 
+===========================================================================
+Family Hierarchy
+===========================================================================
+INPUT:	The found varieties and the hierarchy of languages.csv (Family_ID 
+		and Language_ID, precomputed with the Glottolog Data).
+OUTPUT: The descendants (languages of a family, dialects of a language) 
+		and/or ancestors (language of a dialect, family of a language) of
+		each found variety (--family), in time proportional to their number.
+		NOTE: languages.csv links to the top-level family only, subgroups
+		(such as "Kurdish" within Indo-European) have no descendants there.
+"""
+# =========================================================================
+# Glottocodes of all descendants of a node, depth first
+def hierarchy_descendants(glotto_lang_hierarchy, lang_id):
+	if lang_id not in glotto_lang_hierarchy["intervals"]:
+		return []
+	start, end = glotto_lang_hierarchy["intervals"][lang_id]
+	return glotto_lang_hierarchy["order"][start + 1:end]
+
+# =========================================================================
+# Glottocodes of all ancestors of a node, nearest first
+def hierarchy_ancestors(glotto_lang_hierarchy, lang_id):
+	ancestor_ids = []
+	while lang_id in glotto_lang_hierarchy["parents"]:
+		lang_id = glotto_lang_hierarchy["parents"][lang_id]
+		ancestor_ids.append(lang_id)
+	return ancestor_ids
+
+# =========================================================================
+# Relatives of the found varieties: name → {"related_to_fam":..., "relation_fam":...}
+# NOTE: Names already in dialect_info_dict are not added again, each name is kept for the first variety it is found for
+def find_family_relatives(dialect_info_dict, reference_tables, family_mode="descendants"):
+	glotto_lang_hierarchy = reference_tables["glotto_lang_hierarchy"]
+	csv_glotto_lang = reference_tables["csv_glotto_lang"]
+	glotto_lang_ids = reference_tables["glotto_lang_ids"]
+	family_relatives = {}
+	for lang_key in dialect_info_dict.keys():
+		# Glottocode of the found variety: matched in languages.csv, or in languages_and_dialects_geo.csv
+		lang_id = dialect_info_dict[lang_key].get("id_l") or dialect_info_dict[lang_key].get("glottocode_ld")
+		if not lang_id:
+			continue
+		relative_ids = []
+		if family_mode in ["ancestors", "both"]:
+			relative_ids.extend(("ancestor", relative_id) for relative_id in hierarchy_ancestors(glotto_lang_hierarchy, lang_id))
+		if family_mode in ["descendants", "both"]:
+			relative_ids.extend(("descendant", relative_id) for relative_id in hierarchy_descendants(glotto_lang_hierarchy, lang_id))
+		if profile_metrics is not None:
+			count_metric("family", "queries")
+			count_metric("family", "relatives_found", len(relative_ids))
+		for relation, relative_id in relative_ids:
+			relative_name = csv_glotto_lang[glotto_lang_ids[relative_id]][1]
+			if relative_name in dialect_info_dict or relative_name in family_relatives:
+				continue
+			family_relatives[relative_name] = {
+				"related_to_fam":lang_key,
+				"relation_fam":relation
+			}
+	return family_relatives
+
+
+""" 
+===========================================================================
+Reverse Lookup
+===========================================================================
+INPUT:	A country (CountryID), an ISO code, a macroarea and/or a level 
+		(language or dialect), e.g. --query --country IQ or 
+		--query --macroarea Eurasia --iso sdh --level dialect
+OUTPUT: The Glottolog varieties (languages.csv) and the Ethnologue names 
+		(LanguageIndex.tab) matching all given criteria, found through the 
+		reverse indexes instead of scanning the tables. Optionally added 
+		to the input of a project (--seed-input).
+		NOTE: Ethnologue has neither macroareas nor levels, with these 
+		criteria only Glottolog varieties are found.
+"""
+# =========================================================================
+# Find varieties by country, ISO code, macroarea and level
+def query_varieties(reference_tables, country=None, iso_code=None, macroarea=None, level=None):
+	query_result = {"glottolog":[], "ethnologue":[], "names":[]}
+	query_criteria = {"country":country, "iso":iso_code, "macroarea":macroarea, "level":level}
+	query_criteria = {index_name:index_key for index_name, index_key in query_criteria.items() if index_key is not None}
+	if len(query_criteria) == 0:
+		return query_result
+
+	# Glottolog: intersection of the row numbers of all criteria, starting with the shortest list
+	glotto_lang_reverse = reference_tables["glotto_lang_reverse"]
+	csv_glotto_lang = reference_tables["csv_glotto_lang"]
+	row_lists = sorted((glotto_lang_reverse[index_name].get(index_key, ()) for index_name, index_key in query_criteria.items()), key=len)
+	row_numbers = set(row_lists[0])
+	for row_list in row_lists[1:]:
+		row_numbers.intersection_update(row_list)
+	for row_number in sorted(row_numbers):
+		entry = csv_glotto_lang[row_number]
+		query_result["glottolog"].append({
+			"name":entry[1],
+			"glottocode":entry[5],
+			"iso639":entry[10],
+			"level":"dialect" if entry[9] != '' else "language",
+			"macroarea":entry[2],
+			"countries":entry[7]
+		})
+
+	# Ethnologue: the groups of the ISO code or of the LangIDs listed in the country
+	if "macroarea" not in query_criteria and "level" not in query_criteria:
+		ethno_langindex = reference_tables["ethno_langindex"]
+		if iso_code is not None:
+			lang_ids = [iso_code]
+		else:
+			lang_ids = reference_tables["ethno_country_langs"].get(country, [])
+		for lang_id in lang_ids:
+			for lang_country, lang_type, lang_name in ethno_langindex.group(lang_id):
+				if country is None or lang_country == country:
+					query_result["ethnologue"].append({
+						"name":lang_name,
+						"iso639":lang_id,
+						"countryId":lang_country,
+						"nameType":lang_type
+					})
+
+	# Every name only once, Glottolog names first
+	known_names = set()
+	for query_match in query_result["glottolog"] + query_result["ethnologue"]:
+		if query_match["name"] not in known_names:
+			known_names.add(query_match["name"])
+			query_result["names"].append(query_match["name"])
+	return query_result
+
+# =========================================================================
+# Add names to the input of a project (./languages/<lang>/input_varieties.txt), names already listed are kept once
+def seed_input_varieties(lang, names):
+	input_file = f'./languages/{lang}/input_varieties.txt'
+	create_directory(f'./languages/{lang}/')
+	known_names = []
+	if os.path.isfile(input_file):
+		with open(input_file, 'r') as f:
+			known_names = [line.replace('\n','') for line in f]
+	known_name_set = set(known_names)
+	new_names = [name for name in names if name not in known_name_set]
+	write_output_file(input_file, (name+'\n' for name in known_names + new_names))
+	logger.info(f'Seeded {input_file}: {len(new_names)} new names ({len(known_names) + len(new_names)} in total)')
+	return new_names
+
+# =========================================================================
+# Answer a query from the command line (--query)
+def run_query(reference_tables, args):
+	# NOTE: The tables are loaded (from their snapshots) before the query is timed
+	for table_name in ["csv_glotto_lang", "glotto_lang_reverse", "ethno_langindex", "ethno_country_langs"]:
+		reference_tables[table_name]
+	query_start = time.perf_counter()
+	query_result = query_varieties(reference_tables, country=args.country, iso_code=args.iso, macroarea=args.macroarea, level=args.level)
+	query_seconds = time.perf_counter() - query_start
+	for query_match in query_result["glottolog"]:
+		print(f'glottolog\t{query_match["name"]}\t{query_match["glottocode"]}\t{query_match["iso639"]}\t{query_match["level"]}\t{query_match["macroarea"]}\t{query_match["countries"]}')
+	for query_match in query_result["ethnologue"]:
+		print(f'ethnologue\t{query_match["name"]}\t{query_match["iso639"]}\t{query_match["countryId"]}\t{query_match["nameType"]}')
+	print(f'Query: {len(query_result["glottolog"])} Glottolog varieties, {len(query_result["ethnologue"])} Ethnologue names, {len(query_result["names"])} distinct names in {query_seconds * 1000:.2f}ms')
+	if args.seed_input:
+		seed_input_varieties(args.lang, query_result["names"])
+	return query_result
+
+# =========================================================================
+# Complete a prefix (--complete) and/or export the completion index (--export-completion) from the command line
+def run_completion(reference_tables, args):
+	# NOTE: The index is built before the completion is timed
+	completion_index = get_completion_index(reference_tables)
+	if args.complete is not None:
+		complete_start = time.perf_counter()
+		completions = complete_name(completion_index, args.complete, args.top_k)
+		complete_seconds = time.perf_counter() - complete_start
+		for completion in completions:
+			print(f'{completion["name"]}\t{completion["glottocode"]}\t{completion["iso639"]}')
+		print(f'Completion: {len(completions)} names for "{args.complete}" in {complete_seconds * 1000:.3f}ms')
+	if args.export_completion:
+		export_completion_index(args.export_completion, reference_tables)
 
 
-	# LanguageCodes.tab
-	""" Header:
-	['LangID', 'CountryID', 'LangStatus', 'Name']
-	['aaa', 'NG', 'L', 'Ghotuo']
-	['aab', 'NG', 'L', 'Arum']
+""" 
+===========================================================================
+Ethnologue Data
+===========================================================================
+INPUT: 	A list of terms associated with language varieties + additional data
+	   	such as ISO codes acquired in the step above.
+OUTPUT: Additional information for each of these terms that is contained
+		in the Glottolog data, such as ISO codes used further below
+"""
+
+# =========================================================================
+# Select already known language codes to guide exploration
+def select_iso_codes(dialect_info_dict):
+	known_iso_codes = []
+	for lang_key in dialect_info_dict.keys():
+		lang_id = "None"
+		# If the first glottolog-query resulted in an ISO code
+		if "isocode_ld" in dialect_info_dict[lang_key]:
+			if not dialect_info_dict[lang_key]["isocode_ld"] == '':
+				lang_id = dialect_info_dict[lang_key]["isocode_ld"]
+		# If the second glottolog-query resulted in an ISO code
+		elif "isocode_l" in dialect_info_dict[lang_key]:
+			if not dialect_info_dict[lang_key]["isocode_l"] == '':
+				lang_id = dialect_info_dict[lang_key]["isocode_l"]
+		# If there was only a "closest" ISO code to be found
+		elif "closestisocode_l" in dialect_info_dict[lang_key]:
+			if not dialect_info_dict[lang_key]["closestisocode_l"] == '':
+				lang_id = dialect_info_dict[lang_key]["closestisocode_l"]
+		else:
+			pass
+			
+		known_iso_codes.append(lang_id)
+	# Debugging
+	#print(f'Currently known ISO codes: {known_iso_codes}')
+	known_iso_codes = list(set(known_iso_codes))
+
+	# NOTE: This check only became necessary once I used the output (35 varieties) from the German input (3 varieties)
+	if "None" in known_iso_codes:
+		known_iso_codes.remove("None")
+	logger.info(f'Currently known unique ISO codes: {known_iso_codes}')
+
+	# Dictionary to hold new items from ethnologue
+	dialect_info_dict_ethno = {} 
+
+	# Fill the known ISO codes into the dictionary to start Ethnologue look-up
+	for iso_code in known_iso_codes:
+		dialect_info_dict_ethno[iso_code] = {}
+
+	return dialect_info_dict_ethno
+
+
+# LanguageIndex.tab
+""" Header:
+['LangID', 'CountryID', 'NameType', 'Name']
+['aaa', 'NG', 'L', 'Ghotuo']
+['aaa', 'NG', 'LA', 'Otuo']
+
+LangID, CountryID, NameType, Name
+kmr	AM	L	Kurdish, Northern
+kmr	AZ	L	Kurdish, Northern
+...
+kmr	IR	D	Northern Kurdish
+"""
+# =========================================================================
+# Read Ethnologue (Language Index) Data grouped by LangID
+def index_ethnologue_li(input_eth_languageindex):
+	# Rows of (CountryID, NameType, Name) grouped by LangID, in the order of the file
+	# NOTE: CountryID and NameType are stored as codes, names packed and the LangID only once per group
+	with open(input_eth_languageindex, newline='') as csv_file:
+		csv_reader = csv.reader(csv_file, delimiter='\t', quotechar='"')
+		ethno_langindex = ColumnTable.from_rows(csv_reader, keep_columns=(1, 2, 3), coded_columns=(1, 2), packed_columns=(3,), group_column=0)
+	return ethno_langindex
+
+# =========================================================================
+# Index Ethnologue (Language Index) Data by country: CountryID → LangIDs with names in this country
+# NOTE: The rows of a country are then read from the (small) groups of these LangIDs
+def index_ethnologue_li_countries(ethno_langindex):
+	ethno_country_langs = {}
+	for lang_id, (first_row, end_row) in ethno_langindex.groups.items():
+		if lang_id == "LangID":
+			continue
+		for lang_country in {ethno_langindex[row_number][0] for row_number in range(first_row, end_row)}:
+			if lang_country in ethno_country_langs:
+				ethno_country_langs[lang_country].append(lang_id)
+			else:
+				ethno_country_langs[lang_country] = [lang_id]
+	return ethno_country_langs
+
+# =========================================================================
+# Filter Ethnologue (Language Index) Data
+def filter_ethnologue_li(dialect_info_dict_ethno, ethno_langindex):
+	for iso_code in dialect_info_dict_ethno.keys():
+		# For each entry in the ethno_language_index data with this LangID
+		for lang_country, lang_type, lang_name in ethno_langindex.group(iso_code):
+			# Item for each language name to hold the CountryID and NameType
+			# Simply add new information if item for this Name already exists
+			if lang_name in dialect_info_dict_ethno[iso_code]:
+				dialect_info_dict_ethno[iso_code][lang_name][lang_country] = lang_type
+			
+			# Create new item with Name from entry if not exists
+			else:
+				dialect_info_dict_ethno[iso_code][lang_name] = {}
+				dialect_info_dict_ethno[iso_code][lang_name][lang_country] = lang_type
+	return dialect_info_dict_ethno
+	""" New Information in dialect_info_dict_ethno
+	"kmr":{
+		"Kurdish, Northern": {
+			"AM":"L",
+			"AZ":"L", ...
+		}, ...
+	},
+	"ckb": {
+		"Kurdish, Central": {
+			"IQ":"L", ...
+		}, ...
+	}, ...
 	"""
-	# =========================================================================
-	# Read Ethnologue (Language Codes) Data
-	def read_ethnologue_lc(input_eth_languagecodes):
-		csv_ethno_langcode = read_csv_file(input_eth_languagecodes, '', '\t', '"')
-		print(f'Ethnologue Language Codes:')
-		print(csv_ethno_langcode[0])
-		print(csv_ethno_langcode[1])
-		print(csv_ethno_langcode[2])
-		return csv_ethno_langcode
-		"""
-		LangID, CountryID, LangStatus, Name
-		kmr	TR	L	Kurdish, Northern
-		ckb	IQ	L	Kurdish, Central
-		sdh	IR	L	Kurdish, Southern
-		"""
 
+
+
+""" 
+dialect_info_dict = {
+	"Central Kurdish": {
+		"key":"item", ...
+	},
+	"Sorani": {
+		"key":"item", ...
+	}, ...
+}
+
+dialect_info_dict_ethno_country = {
+	"hac": {
+		"Kakai": {
+			"IQ": "D"
+		}.
+		"Zengana": {
+			"IQ": "D"
+		}, ...
+	},
+	"kmr": {
+		"Kurdish, Northern": {
+			"AM": "L", ...
+		}, ...
+	}, ...
+}
+"""
+
+# =========================================================================
+# Filter Ethnologue Names and Original Names to find new Language Names
+def filter_ethno_new(dialect_word_list, dialect_info_dict_ethno_country):
+	# NOTE: Set for membership tests, removing known names one by one from a list was quadratic
+	if isinstance(dialect_word_list, (set, frozenset)):
+		known_lang_names = dialect_word_list
+	else:
+		known_lang_names = set(dialect_word_list)
+	#print(f'Known Language Names: {known_lang_names}')
+	#for lang_name in dialect_info_dict.keys():
+	#	known_lang_names.append(lang_name)
+
+	new_lang_names = []
+	for iso_code in dialect_info_dict_ethno_country.keys():
+		for lang_name in dialect_info_dict_ethno_country[iso_code].keys():
+			new_lang_names.append(lang_name)
 	
-	
+	# Keep unique names and remove already known names
+	new_lang_names = [lang_name for lang_name in set(new_lang_names) if lang_name not in known_lang_names]
 
+	return new_lang_names
 
 
+# =========================================================================
+# Look up newly found language names round by round
+def expand_new_names(dialect_word_list, dialect_info_dict_ethno_country, reference_tables, max_depth=1, max_names=0, name_matching=None, term_cache=None, workers=1):
 	""" 
-	===========================================================================
-	Execution of Script
-	===========================================================================
+	Each round only handles the frontier of the previous round:
+		- the names listed by Ethnologue for the ISO codes found last round,
+		- the ISO codes found for these names that have not been expanded yet.
+	Names and ISO codes handled in an earlier round are never looked up again.
+	max_depth: Number of rounds, 0 to repeat until no new names are found
+	max_names: Number of new names to look up in total, 0 for no limit
+	"""
+	known_lang_names = set(dialect_word_list)
+	known_iso_codes = set(dialect_info_dict_ethno_country.keys())
+
+	dialect_info_dict_new = {}
+	dialect_info_dict_ethno_country_new = {}
+	expansion_rounds = []
+
+	frontier_ethno_country = dialect_info_dict_ethno_country
+	round_number = 0
+	while len(frontier_ethno_country) > 0:
+		if max_depth > 0 and round_number >= max_depth:
+			break
+		round_number += 1
+		round_start = time.perf_counter()
+
+		# Filter new language names found in Ethnologue Data of the last round
+		with profile_stage("filter_ethno_new"):
+			new_lang_names = filter_ethno_new(known_lang_names, frontier_ethno_country)
+		names_limited = False
+		if max_names > 0 and len(dialect_info_dict_new) + len(new_lang_names) > max_names:
+			# NOTE: Sorted before cutting, so the same names are kept in every run
+			new_lang_names = sorted(new_lang_names)[:max_names - len(dialect_info_dict_new)]
+			names_limited = True
+		known_lang_names.update(new_lang_names)
+		new_lang_dict = word_list_to_dict(new_lang_names)
+
+		# Glottolog Data for the new names
+		new_lang_dict = resolve_glottolog_terms(new_lang_dict, reference_tables, name_matching, term_cache, workers)
+
+		# Ethnologue Data for ISO codes not expanded in an earlier round
+		frontier_ethno_country = select_iso_codes(new_lang_dict)
+		for iso_code in list(frontier_ethno_country.keys()):
+			if iso_code in known_iso_codes:
+				del frontier_ethno_country[iso_code]
+		known_iso_codes.update(frontier_ethno_country.keys())
+		frontier_ethno_country = expand_iso_codes(frontier_ethno_country, reference_tables, term_cache, workers)
+
+		dialect_info_dict_new.update(new_lang_dict)
+		dialect_info_dict_ethno_country_new.update(frontier_ethno_country)
+
+		round_info = {
+			"round":round_number,
+			"new_names":len(new_lang_dict),
+			"new_iso_codes":len(frontier_ethno_country),
+			"seconds":round(time.perf_counter() - round_start, 4)
+		}
+		expansion_rounds.append(round_info)
+		logger.info(f'Expansion round {round_info["round"]}: {round_info["new_names"]} new names, {round_info["new_iso_codes"]} new ISO codes ({round_info["seconds"]}s)')
+
+		if names_limited:
+			logger.info(f'Stopping expansion: limit of {max_names} new names reached')
+			break
+
+	return dialect_info_dict_new, dialect_info_dict_ethno_country_new, expansion_rounds
+
+
+# CountryCodes.tab
+""" Header:
+['CountryID', 'Name', 'Area']
+['AD', 'Andorra', 'Europe']
+['AE', 'United Arab Emirates', 'Asia']
+"""
+# =========================================================================
+# Read Ethnologue (Country ID) Data
+def read_etnologue_ci(input_eth_countrycodes):
+	csv_ethno_country = read_csv_file(input_eth_countrycodes, '', '\t', '"')
+	#print(f'Ethnologue Country Codes:')
+	#print(csv_ethno_country[0])
+	#print(csv_ethno_country[1])
+	#print(csv_ethno_country[2])
+	return csv_ethno_country
+	"""
+	CountryID, Name, Area
+	IR	Iran	Asia
+	SY	Syria	Asia
 	"""
-	# Input Language Terms
-	dialect_word_list = read_language_names(input_path)
-	dialect_info_dict = word_list_to_dict(dialect_word_list)
 
-	# Glottolog Data
-	csv_glotto_langdial = read_glottolog_ld_data(input_glo_languagesanddialectsgeo)
-	dialect_info_dict = filter_glottolog_ld_data(dialect_info_dict, csv_glotto_langdial)
-	csv_glotto_lang = read_glottolog_l_data(input_glo_languages)
-	dialect_info_dict = filter_glottolog_l_data(dialect_info_dict, csv_glotto_lang)
 
-	# ISO Codes from Glottolog
-	dialect_info_dict_ethno_country = select_iso_codes(dialect_info_dict)
 
-	# Ethnologue Data
-	csv_ethno_langindex = read_ethnologue_li(input_eth_languageindex)
-	dialect_info_dict_ethno_country = filter_ethnologue_li(dialect_info_dict_ethno_country, csv_ethno_langindex)
+# LanguageCodes.tab
+""" Header:
+['LangID', 'CountryID', 'LangStatus', 'Name']
+['aaa', 'NG', 'L', 'Ghotuo']
+['aab', 'NG', 'L', 'Arum']
+"""
+# =========================================================================
+# Read Ethnologue (Language Codes) Data
+def read_ethnologue_lc(input_eth_languagecodes):
+	csv_ethno_langcode = read_csv_file(input_eth_languagecodes, '', '\t', '"')
+	#print(f'Ethnologue Language Codes:')
+	#print(csv_ethno_langcode[0])
+	#print(csv_ethno_langcode[1])
+	#print(csv_ethno_langcode[2])
+	return csv_ethno_langcode
+	"""
+	LangID, CountryID, LangStatus, Name
+	kmr	TR	L	Kurdish, Northern
+	ckb	IQ	L	Kurdish, Central
+	sdh	IR	L	Kurdish, Southern
+	"""
 
+# =========================================================================
+# Index Ethnologue (Country ID) Data: CountryID → (Name, Area)
+# NOTE: Built once for hash joins (the header row is left out)
+def index_ethnologue_ci(csv_ethno_country):
+	ethno_country_index = {}
+	for entry in csv_ethno_country[1:]:
+		ethno_country_index[entry[0]] = (entry[1], entry[2])
+	return ethno_country_index
+
+# =========================================================================
+# Index Ethnologue (Language Codes) Data: LangID → (CountryID, LangStatus, Name)
+# NOTE: Country and name are those of the primary entry of the language
+def index_ethnologue_lc(csv_ethno_langcode):
+	ethno_langcode_index = {}
+	for entry in csv_ethno_langcode[1:]:
+		ethno_langcode_index[entry[0]] = (entry[1], entry[2], entry[3])
+	return ethno_langcode_index
 
-	# NOTE: Writing of intermediate files for manual checking of functionalities
-	# Serializing jsons and write to files
-	json_object = json.dumps(dialect_info_dict, indent=4)
-	output_json = f'{inter_path}dialect_info_dict_intermediate.json'
-	with open(output_json, "w") as outfile:
-		outfile.write(json_object)
 
-	json_object = json.dumps(dialect_info_dict_ethno_country, indent=4)
-	output_json = f'{inter_path}dialect_country_dict_intermediate.json'
-	with open(output_json, "w") as outfile:
-		outfile.write(json_object)
+""" 
+===========================================================================
+Country and Language Status
+===========================================================================
+INPUT:	The selected output dialect dictionary and the ISO codes found.
+OUTPUT: Country names and areas for the countries of each dialect, the 
+		Ethnologue status (L: living, X: extinct), primary name and primary
+		country for each ISO code, joined through the indexes of 
+		CountryCodes.tab and LanguageCodes.tab.
+"""
+# =========================================================================
+# Ethnologue information for one ISO code (None if it is not in LanguageCodes.tab)
+def iso_code_information(iso_code, ethno_country_index, ethno_langcode_index):
+	if iso_code not in ethno_langcode_index:
+		return None
+	primary_country, lang_status, primary_name = ethno_langcode_index[iso_code]
+	iso_information = {
+		"languageStatus":lang_status,
+		"primaryName":primary_name,
+		"primaryCountry":primary_country
+	}
+	if primary_country in ethno_country_index:
+		iso_information["primaryCountryName"], iso_information["area"] = ethno_country_index[primary_country]
+	return iso_information
+
+# =========================================================================
+# Add country names, language status and primary names to the output dialect dictionary
+def enrich_dialect_info(dialect_info_dict_selected, iso_codes, reference_tables):
+	ethno_country_index = reference_tables["ethno_country_index"]
+	ethno_langcode_index = reference_tables["ethno_langcode_index"]
+
+	for lang_name in dialect_info_dict_selected["dialects"].keys():
+		lang_information = dialect_info_dict_selected["dialects"][lang_name]["languageInformation"]
+		# Countries are stored as "IQ;IR"
+		if "countries" in lang_information:
+			country_details = []
+			for country_id in lang_information["countries"].split(';'):
+				country_detail = {"countryId":country_id}
+				if country_id in ethno_country_index:
+					country_detail["name"], country_detail["area"] = ethno_country_index[country_id]
+				country_details.append(country_detail)
+			lang_information["countryDetails"] = country_details
+		if "iso639" in lang_information and lang_information["iso639"] in ethno_langcode_index:
+			primary_country, lang_status, primary_name = ethno_langcode_index[lang_information["iso639"]]
+			lang_information["languageStatus"] = lang_status
+			lang_information["primaryName"] = primary_name
+
+	# Every ISO code of the project: those of the dialects and those found in Ethnologue Data
+	iso_code_list = sorted(set(iso_codes) | {dialect["languageInformation"]["iso639"] 
+		for dialect in dialect_info_dict_selected["dialects"].values() if "iso639" in dialect["languageInformation"]})
+	dialect_info_dict_selected["isoCodes"] = {}
+	for iso_code in iso_code_list:
+		iso_information = iso_code_information(iso_code, ethno_country_index, ethno_langcode_index)
+		if iso_information is not None:
+			dialect_info_dict_selected["isoCodes"][iso_code] = iso_information
+	return dialect_info_dict_selected
+
 
 
-	# Filter new language names found in Ethnologue Data
-	new_lang_names = filter_ethno_new(dialect_word_list, dialect_info_dict_ethno_country)
-	new_lang_dict = word_list_to_dict(new_lang_names)
 
-	# TODO: Turn into loop until no new language names are found(?)
-	dialect_info_dict_new = filter_glottolog_ld_data(new_lang_dict, csv_glotto_langdial)
-	dialect_info_dict_new = filter_glottolog_l_data(dialect_info_dict_new, csv_glotto_lang)
-	dialect_info_dict_ethno_country_new = select_iso_codes(new_lang_dict)
-	dialect_info_dict_ethno_country_new = filter_ethnologue_li(dialect_info_dict_ethno_country_new, csv_ethno_langindex)
 
-	# Serializing jsons and write to files
-	json_object = json.dumps(dialect_info_dict_new, indent=4)
-	output_json = f'{inter_path}dialect_info_dict_new.json'
-	with open(output_json, "w") as outfile:
-		outfile.write(json_object)
 
-	json_object = json.dumps(dialect_info_dict_ethno_country_new, indent=4)
-	output_json = f'{inter_path}dialect_country_dict_new.json'
-	with open(output_json, "w") as outfile:
-		outfile.write(json_object)
+""" 
+===========================================================================
+Variety Clusters
+===========================================================================
+INPUT:	All found names with their Glottolog and Ethnologue information and
+		the nameOrthographies groups of the input (.json and .jsonl).
+OUTPUT: Canonical varieties, each merging the names that share a glottocode,
+		an ISO code (also the names Ethnologue lists for that ISO code) or 
+		an input group, e.g. "Central Kurdish", "Sorani", "Kurdish, Central"
+		→ "ckb". The canonical ID is the (first) ISO code of the variety, 
+		its (first) glottocode if it has none, or else its first name.
+		Names are merged with a union-find structure, in near linear time.
+"""
+# =========================================================================
+# Number of the node for a name, glottocode or ISO code (added if new)
+def cluster_node(union_find, node_key):
+	if node_key not in union_find["nodes"]:
+		union_find["nodes"][node_key] = len(union_find["parents"])
+		union_find["parents"].append(len(union_find["parents"]))
+		union_find["sizes"].append(1)
+	return union_find["nodes"][node_key]
+
+# =========================================================================
+# Root node of the cluster of a node (path halving keeps the paths short)
+def cluster_root(union_find, node_number):
+	parents = union_find["parents"]
+	while parents[node_number] != node_number:
+		parents[node_number] = parents[parents[node_number]]
+		node_number = parents[node_number]
+	return node_number
+
+# =========================================================================
+# Merge the clusters of two nodes (the smaller one is attached to the larger one)
+def join_clusters(union_find, first_key, second_key):
+	first_root = cluster_root(union_find, cluster_node(union_find, first_key))
+	second_root = cluster_root(union_find, cluster_node(union_find, second_key))
+	if first_root == second_root:
+		return
+	if union_find["sizes"][first_root] < union_find["sizes"][second_root]:
+		first_root, second_root = second_root, first_root
+	union_find["parents"][second_root] = first_root
+	union_find["sizes"][first_root] += union_find["sizes"][second_root]
+
+# =========================================================================
+# Cluster all names into canonical varieties
+def cluster_varieties(dialect_info_dict_out, dialect_info_dict_ethno_country_out, name_groups=()):
+	union_find = {"nodes":{}, "parents":[], "sizes":[]}
+
+	# Names sharing a glottocode or an ISO code (from either Glottolog table)
+	for lang_name in dialect_info_dict_out.keys():
+		lang_info = dialect_info_dict_out[lang_name]
+		cluster_node(union_find, ("name", lang_name))
+		for glottocode_key in ["glottocode_ld", "id_l"]:
+			if lang_info.get(glottocode_key, '') != '':
+				join_clusters(union_find, ("name", lang_name), ("glottocode", lang_info[glottocode_key]))
+		for isocode_key in ["isocode_ld", "isocode_l"]:
+			if lang_info.get(isocode_key, '') != '':
+				join_clusters(union_find, ("name", lang_name), ("iso", lang_info[isocode_key]))
+
+	# Names listed by Ethnologue for an ISO code
+	# NOTE: Names listed for several ISO codes ("Kurdi" for ckb and kmr) would merge these languages, so they are skipped
+	ethno_name_counts = {}
+	for iso_code in dialect_info_dict_ethno_country_out.keys():
+		for lang_name in dialect_info_dict_ethno_country_out[iso_code].keys():
+			ethno_name_counts[lang_name] = ethno_name_counts.get(lang_name, 0) + 1
+	for iso_code in dialect_info_dict_ethno_country_out.keys():
+		cluster_node(union_find, ("iso", iso_code))
+		for lang_name in dialect_info_dict_ethno_country_out[iso_code].keys():
+			if ethno_name_counts[lang_name] == 1:
+				join_clusters(union_find, ("name", lang_name), ("iso", iso_code))
+			else:
+				cluster_node(union_find, ("name", lang_name))
+
+	# Orthographies of the same dialect in the input
+	for name_group in name_groups:
+		for lang_name in name_group[1:]:
+			join_clusters(union_find, ("name", name_group[0]), ("name", lang_name))
+
+	# Names, glottocodes and ISO codes of each cluster (names in the order they were found)
+	cluster_members = {}
+	for (node_type, node_value), node_number in union_find["nodes"].items():
+		root_number = cluster_root(union_find, node_number)
+		if root_number not in cluster_members:
+			cluster_members[root_number] = {"name":[], "glottocode":[], "iso":[]}
+		cluster_members[root_number][node_type].append(node_value)
+
+	dialect_clusters = {"varieties":{}, "aliases":{}}
+	for root_number, members in cluster_members.items():
+		# NOTE: Glottocodes or ISO codes without any name do not form a variety
+		if len(members["name"]) == 0:
+			continue
+		glottocodes = sorted(members["glottocode"])
+		iso_codes = sorted(members["iso"])
+		if len(iso_codes) > 0:
+			canonical_id = iso_codes[0]
+		elif len(glottocodes) > 0:
+			canonical_id = glottocodes[0]
+		else:
+			canonical_id = members["name"][0]
+		dialect_clusters["varieties"][canonical_id] = {
+			"name":members["name"][0],
+			"aliases":sorted(members["name"]),
+			"glottocodes":glottocodes,
+			"isoCodes":iso_codes
+		}
+		for lang_name in members["name"]:
+			dialect_clusters["aliases"][lang_name] = canonical_id
+	# NOTE: Newly found names come in no fixed order (sets), sorting keeps the file the same between runs
+	dialect_clusters["varieties"] = dict(sorted(dialect_clusters["varieties"].items()))
+	dialect_clusters["aliases"] = dict(sorted(dialect_clusters["aliases"].items()))
 
-	# TODO: Handle these files for more info
-	#csv_ethno_country = read_etnologue_ci(input_eth_countrycodes)
-	#csv_ethno_langcode = read_ethnologue_lc(input_eth_languagecodes)
+	logger.info(f'Variety clusters: {len(dialect_clusters["aliases"])} names in {len(dialect_clusters["varieties"])} canonical varieties')
+	return dialect_clusters
 
 
-	# Merge intermediate dictionaries wie new dictionaries into output files
-	# NOTE: The second list is merged into the first list and no new list is created. 
-	dialect_info_dict_out = dialect_info_dict
-	dialect_info_dict_out.update(dialect_info_dict_new)
 
-	dialect_info_dict_ethno_country_out = dialect_info_dict_ethno_country
-	dialect_info_dict_ethno_country_out.update(dialect_info_dict_ethno_country_new)
 
-	# Serializing jsons and write to files
-	# All the country information from Ethnologue
-	json_object = json.dumps(dialect_info_dict_ethno_country_out, indent=4)
-	output_json = f'{output_path}dialect_country_dict.json'
-	with open(output_json, "w") as outfile:
-		outfile.write(json_object)
 
-	# All found information from Glottolog
-	json_object = json.dumps(dialect_info_dict_out, indent=4)
-	output_json = f'{output_path}dialect_info_dict_extra.json'
-	with open(output_json, "w") as outfile:
-		outfile.write(json_object)
+""" 
+===========================================================================
+Reference Data Cache
+===========================================================================
+INPUT:	The Glottolog and Ethnologue files in ./data/ 
+OUTPUT: The parsed tables and their lookup indexes, one binary snapshot per
+		source file in ./data/cache/reference/, loaded from there in later runs.
+		A snapshot is rebuilt as soon as its source file changed (such as 
+		when a new Glottolog or Ethnologue release is dropped in).
+		Each source is only read (or loaded from its snapshot) when one of
+		its tables is used for the first time, tables that are certainly 
+		needed can be loaded in the background while the input is read.
+"""
+# NOTE: Increase when the content of the snapshots changes
+cache_format_version = 9
+
+# Tables stored as ColumnTable, kept as plain state in the snapshots
+column_table_names = ["csv_glotto_langdial", "csv_glotto_lang", "ethno_langindex"]
+
+# Source → tables built from its file (the first one is the table itself, followed by its indexes)
+reference_source_tables = {
+	"glottolog_ld":["csv_glotto_langdial", "glotto_langdial_names"],
+	"glottolog_l":["csv_glotto_lang", "glotto_lang_names", "glotto_lang_ids", "glotto_lang_hierarchy", "glotto_lang_reverse"],
+	"ethnologue_li":["ethno_langindex", "ethno_country_langs"],
+	"ethnologue_ci":["csv_ethno_country", "ethno_country_index"],
+	"ethnologue_lc":["csv_ethno_langcode", "ethno_langcode_index"]
+}
+
+# =========================================================================
+# Describe a source file by size, modification time and content hash
+def describe_source_file(input_file, known_description=None):
+	file_stat = os.stat(input_file)
+	description = {
+		"size":file_stat.st_size,
+		"mtime_ns":file_stat.st_mtime_ns
+	}
+	# NOTE: Hashing is skipped as long as size and modification time are unchanged
+	if known_description is not None and known_description["size"] == description["size"] and known_description["mtime_ns"] == description["mtime_ns"]:
+		description["sha1"] = known_description["sha1"]
+		return description
+	file_hash = hashlib.sha1()
+	with open(input_file, 'rb') as f:
+		for chunk in iter(lambda: f.read(1024 * 1024), b''):
+			file_hash.update(chunk)
+	description["sha1"] = file_hash.hexdigest()
+	return description
+
+# =========================================================================
+# Check whether the snapshot still matches the source files
+# file_descriptions: Source file → its current description, if already known (filled with those described here)
+def check_cache_manifest(cache_manifest, source_files, file_descriptions=None):
+	if file_descriptions is None:
+		file_descriptions = {}
+	if cache_manifest.get("version") != cache_format_version:
+		return "format version changed"
+	if sorted(cache_manifest["sources"].keys()) != sorted(source_files):
+		return "set of source files changed"
+	for source_file in source_files:
+		known_description = cache_manifest["sources"][source_file]
+		if not os.path.isfile(source_file):
+			return f'{source_file} is missing'
+		if source_file not in file_descriptions:
+			file_descriptions[source_file] = describe_source_file(source_file, known_description)
+		if file_descriptions[source_file]["sha1"] != known_description["sha1"]:
+			return f'{source_file} changed'
+	return None
+
+# =========================================================================
+# Manifest of a snapshot (None if there is none or it is unreadable)
+def read_cache_manifest(cache_file):
+	if not os.path.isfile(cache_file):
+		return None
+	try:
+		with open(cache_file, 'rb') as f:
+			return pickle.load(f)
+	except (OSError, EOFError, pickle.UnpicklingError):
+		return None
+
+# =========================================================================
+# Tables of a snapshot, read from the open file right after its manifest
+def read_snapshot_tables(f):
+	# NOTE: The garbage collector only slows down loading many small objects at once
+	gc.disable()
+	try:
+		source_tables = pickle.load(f)
+	finally:
+		gc.enable()
+	for table_name in column_table_names:
+		if table_name in source_tables:
+			source_tables[table_name] = ColumnTable.from_state(source_tables[table_name])
+	return source_tables
+
+# =========================================================================
+# Version of the reference data: hash over the content hashes of all source files
+def reference_data_version(source_descriptions):
+	version_hash = hashlib.sha1()
+	for source_file in sorted(source_descriptions.keys()):
+		version_hash.update(f'{source_file}:{source_descriptions[source_file]["sha1"]};'.encode('utf-8'))
+	return version_hash.hexdigest()
+
+# =========================================================================
+# Parse the file of one source and build its lookup indexes
+def build_source_tables(source_name, source_file):
+	if source_name == "glottolog_ld":
+		csv_glotto_langdial = read_glottolog_ld_data(source_file)
+		return {
+			"csv_glotto_langdial":csv_glotto_langdial,
+			"glotto_langdial_names":index_glottolog_ld_data(csv_glotto_langdial)
+		}
+	if source_name == "glottolog_l":
+		csv_glotto_lang = read_glottolog_l_data(source_file)
+		glotto_lang_names, glotto_lang_ids = index_glottolog_l_data(csv_glotto_lang)
+		return {
+			"csv_glotto_lang":csv_glotto_lang,
+			"glotto_lang_names":glotto_lang_names,
+			"glotto_lang_ids":glotto_lang_ids,
+			"glotto_lang_hierarchy":index_glottolog_l_hierarchy(csv_glotto_lang),
+			"glotto_lang_reverse":index_glottolog_l_reverse(csv_glotto_lang)
+		}
+	if source_name == "ethnologue_li":
+		ethno_langindex = index_ethnologue_li(source_file)
+		return {
+			"ethno_langindex":ethno_langindex,
+			"ethno_country_langs":index_ethnologue_li_countries(ethno_langindex)
+		}
+	if source_name == "ethnologue_ci":
+		csv_ethno_country = read_etnologue_ci(source_file)
+		return {
+			"csv_ethno_country":csv_ethno_country,
+			"ethno_country_index":index_ethnologue_ci(csv_ethno_country)
+		}
+	if source_name == "ethnologue_lc":
+		csv_ethno_langcode = read_ethnologue_lc(source_file)
+		return {
+			"csv_ethno_langcode":csv_ethno_langcode,
+			"ethno_langcode_index":index_ethnologue_lc(csv_ethno_langcode)
+		}
+	raise KeyError(f'Unknown reference source {source_name}')
+
+# =========================================================================
+# Metrics of loading a source (rows include the header rows)
+def profile_reference_source(source_name, source_tables, cache_status, load_start):
+	profile_metrics["reference_data"][source_name] = {
+		"cache":cache_status,
+		"seconds":round(time.perf_counter() - load_start, 6),
+		"rows":len(source_tables[reference_source_tables[source_name][0]])
+	}
+
+# =========================================================================
+# Load the tables of one source from its snapshot, (re)build it if necessary
+# Returns the tables and the description of the source file
+# NOTE: file_description is the current description of the source file if already known, so it is not hashed again
+def load_source_tables(source_name, source_file, cache_file, rebuild_cache=False, use_cache=True, file_description=None):
+	load_start = time.perf_counter()
+	file_descriptions = {}
+	if file_description is not None:
+		file_descriptions[source_file] = file_description
+
+	if not use_cache:
+		source_tables = build_source_tables(source_name, source_file)
+		logger.info(f'Reference cache: disabled, parsed {source_file} in {time.perf_counter() - load_start:.3f}s')
+		if profile_metrics is not None:
+			profile_reference_source(source_name, source_tables, "disabled", load_start)
+		return source_tables, file_descriptions.get(source_file) or describe_source_file(source_file)
+
+	# The snapshot holds two pickled objects: the manifest first, then the tables
+	# NOTE: This way the manifest can be checked without loading the tables
+	cache_miss_reason = None
+	if rebuild_cache:
+		cache_miss_reason = "rebuild requested"
+	elif not os.path.isfile(cache_file):
+		cache_miss_reason = "no snapshot yet"
+	else:
+		try:
+			with open(cache_file, 'rb') as f:
+				cache_manifest = pickle.load(f)
+				cache_miss_reason = check_cache_manifest(cache_manifest, [source_file], file_descriptions)
+				if cache_miss_reason is None:
+					source_tables = read_snapshot_tables(f)
+		except (OSError, EOFError, KeyError, AttributeError, TypeError, pickle.UnpicklingError) as error:
+			cache_miss_reason = f'unreadable snapshot ({error})'
+
+	if cache_miss_reason is None:
+		logger.info(f'Reference cache: hit, loaded {cache_file} in {time.perf_counter() - load_start:.3f}s')
+		if profile_metrics is not None:
+			profile_reference_source(source_name, source_tables, "hit", load_start)
+		return source_tables, cache_manifest["sources"][source_file]
+
+	source_tables = build_source_tables(source_name, source_file)
+	cache_manifest = {
+		"version":cache_format_version,
+		"sources":{source_file:file_descriptions.get(source_file) or describe_source_file(source_file)}
+	}
+	os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+	# Write to a temporary file first, so an interrupted run never leaves a broken snapshot
+	with open(f'{cache_file}.tmp', 'wb') as f:
+		pickle.dump(cache_manifest, f, protocol=pickle.HIGHEST_PROTOCOL)
+		snapshot_tables = dict(source_tables)
+		for table_name in column_table_names:
+			if table_name in source_tables:
+				snapshot_tables[table_name] = source_tables[table_name].to_state()
+		pickle.dump(snapshot_tables, f, protocol=pickle.HIGHEST_PROTOCOL)
+	os.replace(f'{cache_file}.tmp', cache_file)
+	logger.info(f'Reference cache: miss ({cache_miss_reason}), rebuilt {cache_file} in {time.perf_counter() - load_start:.3f}s')
+	if profile_metrics is not None:
+		profile_reference_source(source_name, source_tables, "miss", load_start)
+	return source_tables, cache_manifest["sources"][source_file]
+
+
+class ReferenceTables:
+
+	# Tables are used as reference_tables["csv_glotto_lang"] and loaded on first use
+	# NOTE: Other entries (such as the index for name matching) can be added like to a dictionary
+	def __init__(self, source_paths, cache_path, rebuild_cache=False, use_cache=True):
+		self.source_paths = source_paths
+		self.cache_path = cache_path
+		self.rebuild_cache = rebuild_cache
+		self.use_cache = use_cache
+		# Table name → table, for all loaded sources
+		self.tables = {}
+		# Table name → source it is built from
+		self.table_sources = {table_name:source_name for source_name in source_paths.keys() for table_name in reference_source_tables[source_name]}
+		# Source → description of its file (size, modification time and content hash) once it is loaded
+		self.source_descriptions = {}
+		# Source → description of its file as described for the version (reused when the source is loaded)
+		self.file_descriptions = {}
+		# NOTE: One lock per source, so a table loaded in the background is not loaded twice
+		self.source_locks = {source_name:threading.Lock() for source_name in source_paths.keys()}
+		# Thread loading sources in the background (None if there is none)
+		self.preload_thread = None
+
+	def __getitem__(self, table_name):
+		if table_name not in self.tables:
+			if table_name == "version":
+				self.tables["version"] = self.version()
+			else:
+				self.load_source(self.table_sources[table_name])
+		return self.tables[table_name]
+
+	def __setitem__(self, table_name, table):
+		self.tables[table_name] = table
+
+	def __contains__(self, table_name):
+		return table_name in self.tables or table_name in self.table_sources
 
 	# =========================================================================
-	# Select specific information for output dialect dictionary
+	# Load the tables of a source (if not loaded yet)
+	def load_source(self, source_name):
+		with self.source_locks[source_name]:
+			if source_name in self.source_descriptions:
+				return
+			cache_file = f'{self.cache_path}{source_name}.pickle'
+			source_tables, source_description = load_source_tables(source_name, self.source_paths[source_name], cache_file, 
+				self.rebuild_cache, self.use_cache, self.file_descriptions.get(source_name))
+			self.tables.update(source_tables)
+			self.source_descriptions[source_name] = source_description
+
+	# =========================================================================
+	# Start loading sources in the background, one after the other (their tables are waited for when used)
+	# NOTE: A single thread, parsing several files at once would only compete for the GIL
+	def preload(self, source_names):
+		source_names = [source_name for source_name in source_names if source_name not in self.source_descriptions]
+		if len(source_names) > 0:
+			self.wait_for_preload()
+			self.preload_thread = threading.Thread(target=self.preload_sources, args=(source_names,), daemon=True)
+			self.preload_thread.start()
+
+	# Wait until the sources loaded in the background are loaded (before forking worker processes)
+	def wait_for_preload(self):
+		if self.preload_thread is not None:
+			self.preload_thread.join()
+			self.preload_thread = None
+
+	def preload_sources(self, source_names):
+		for source_name in source_names:
+			try:
+				self.load_source(source_name)
+			except Exception:
+				# NOTE: The error is raised again when the table is used and loaded in the foreground
+				pass
+
+	# =========================================================================
+	# Load all sources (before forking workers or answering lookups)
+	def load_all(self):
+		for source_name in self.source_paths.keys():
+			self.load_source(source_name)
+
+	# =========================================================================
+	# Version of the reference data, without loading any tables
+	# NOTE: Source files are only hashed if they changed since their snapshot was made
+	def version(self):
+		source_descriptions = {}
+		for source_name, source_file in self.source_paths.items():
+			known_description = self.source_descriptions.get(source_name)
+			if known_description is None and self.use_cache and not self.rebuild_cache:
+				cache_manifest = read_cache_manifest(f'{self.cache_path}{source_name}.pickle')
+				if cache_manifest is not None and cache_manifest.get("version") == cache_format_version:
+					known_description = cache_manifest["sources"].get(source_file)
+			source_descriptions[source_file] = describe_source_file(source_file, known_description)
+			if source_name not in self.source_descriptions:
+				self.file_descriptions[source_name] = source_descriptions[source_file]
+		return reference_data_version(source_descriptions)
+
+
+""" 
+===========================================================================
+SQLite Ontology Store
+===========================================================================
+INPUT:	The reference tables and the results of a project.
+OUTPUT: A SQLite database (--sqlite) with indexes on names, glottocodes, 
+		ISO codes and countries, so that other tools can query it directly
+		instead of loading and scanning the json files.
+		The reference tables are only rewritten if the source files changed,
+		the dialects of a project replace those of its previous run.
+		A store of another schema version (sqlite_schema_version) is 
+		rebuilt: its tables are dropped, including the results of all 
+		projects, which are written again by their next run.
+
+Example queries:
+	-- All dialect names of kmr listed for Iran
+	SELECT name, name_type FROM dialect_countries WHERE iso639 = 'kmr' AND country_id = 'IR';
+	-- All Glottolog languages spoken in Iraq
+	SELECT l.* FROM glottolog_languages l JOIN glottolog_language_countries c ON c.id = l.id WHERE c.country_id = 'IQ';
+"""
+# NOTE: Increase the version with every change of the tables below, CREATE TABLE IF NOT EXISTS does not change existing tables
+sqlite_schema_version = 2
+sqlite_schema = """
+CREATE TABLE IF NOT EXISTS store_information (key TEXT PRIMARY KEY, value TEXT);
+
+CREATE TABLE IF NOT EXISTS glottolog_languages_and_dialects (
+	glottocode TEXT, name TEXT, isocodes TEXT, level TEXT, macroarea TEXT, latitude REAL, longitude REAL);
+CREATE INDEX IF NOT EXISTS idx_glottolog_ld_name ON glottolog_languages_and_dialects (name);
+CREATE INDEX IF NOT EXISTS idx_glottolog_ld_glottocode ON glottolog_languages_and_dialects (glottocode);
+CREATE INDEX IF NOT EXISTS idx_glottolog_ld_isocodes ON glottolog_languages_and_dialects (isocodes);
+
+CREATE TABLE IF NOT EXISTS glottolog_languages (
+	id TEXT, name TEXT, macroarea TEXT, latitude REAL, longitude REAL, glottocode TEXT, iso639 TEXT, countries TEXT,
+	family_id TEXT, language_id TEXT, closest_iso639 TEXT);
+CREATE INDEX IF NOT EXISTS idx_glottolog_l_name ON glottolog_languages (name);
+CREATE INDEX IF NOT EXISTS idx_glottolog_l_id ON glottolog_languages (id);
+CREATE INDEX IF NOT EXISTS idx_glottolog_l_glottocode ON glottolog_languages (glottocode);
+CREATE INDEX IF NOT EXISTS idx_glottolog_l_iso639 ON glottolog_languages (iso639);
+
+CREATE TABLE IF NOT EXISTS glottolog_language_countries (id TEXT, country_id TEXT);
+CREATE INDEX IF NOT EXISTS idx_glottolog_lc_country ON glottolog_language_countries (country_id, id);
+
+CREATE TABLE IF NOT EXISTS ethnologue_language_index (lang_id TEXT, country_id TEXT, name_type TEXT, name TEXT);
+CREATE INDEX IF NOT EXISTS idx_ethnologue_li_lang ON ethnologue_language_index (lang_id, country_id);
+CREATE INDEX IF NOT EXISTS idx_ethnologue_li_country ON ethnologue_language_index (country_id);
+CREATE INDEX IF NOT EXISTS idx_ethnologue_li_name ON ethnologue_language_index (name);
+
+CREATE TABLE IF NOT EXISTS ethnologue_country_codes (country_id TEXT PRIMARY KEY, name TEXT, area TEXT);
+
+CREATE TABLE IF NOT EXISTS ethnologue_language_codes (lang_id TEXT PRIMARY KEY, country_id TEXT, lang_status TEXT, name TEXT);
+CREATE INDEX IF NOT EXISTS idx_ethnologue_lc_country ON ethnologue_language_codes (country_id);
+
+CREATE TABLE IF NOT EXISTS dialects (
+	project TEXT, name TEXT, glottocode TEXT, iso639 TEXT, level TEXT, macroarea TEXT, latitude REAL, longitude REAL,
+	countries TEXT, family_id TEXT, language_id TEXT, closest_iso639 TEXT);
+CREATE INDEX IF NOT EXISTS idx_dialects_project_name ON dialects (project, name);
+CREATE INDEX IF NOT EXISTS idx_dialects_name ON dialects (name);
+CREATE INDEX IF NOT EXISTS idx_dialects_glottocode ON dialects (glottocode);
+CREATE INDEX IF NOT EXISTS idx_dialects_iso639 ON dialects (iso639);
+
+CREATE TABLE IF NOT EXISTS dialect_countries (project TEXT, iso639 TEXT, name TEXT, country_id TEXT, name_type TEXT);
+CREATE INDEX IF NOT EXISTS idx_dialect_countries_iso_country ON dialect_countries (iso639, country_id);
+CREATE INDEX IF NOT EXISTS idx_dialect_countries_country ON dialect_countries (country_id);
+CREATE INDEX IF NOT EXISTS idx_dialect_countries_name ON dialect_countries (name);
+CREATE INDEX IF NOT EXISTS idx_dialect_countries_project ON dialect_countries (project);
+"""
+
+# =========================================================================
+# Turn coordinates (strings in the source files) into numbers for the store
+def coordinate_or_none(value):
+	try:
+		return float(value)
+	except (TypeError, ValueError):
+		return None
+
+# =========================================================================
+# Write the Glottolog and Ethnologue tables into the store
+def write_sqlite_reference_tables(connection, reference_tables):
+	# NOTE: The first row of each Glottolog table is its header
+	connection.execute("DELETE FROM glottolog_languages_and_dialects")
+	connection.executemany(
+		"INSERT INTO glottolog_languages_and_dialects VALUES (?, ?, ?, ?, ?, ?, ?)",
+		((entry[0], entry[1], entry[2], entry[3], entry[4], coordinate_or_none(entry[5]), coordinate_or_none(entry[6])) 
+			for entry in itertools.islice(reference_tables["csv_glotto_langdial"], 1, None)))
+
+	connection.execute("DELETE FROM glottolog_languages")
+	connection.executemany(
+		"INSERT INTO glottolog_languages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+		((entry[0], entry[1], entry[2], coordinate_or_none(entry[3]), coordinate_or_none(entry[4])) + entry[5:11] 
+			for entry in itertools.islice(reference_tables["csv_glotto_lang"], 1, None)))
+
+	# Countries of a language are stored as "IQ;IR"
+	connection.execute("DELETE FROM glottolog_language_countries")
+	connection.executemany(
+		"INSERT INTO glottolog_language_countries VALUES (?, ?)",
+		((entry[0], country_id) for entry in itertools.islice(reference_tables["csv_glotto_lang"], 1, None) for country_id in entry[7].split(';') if country_id != ''))
+
+	connection.execute("DELETE FROM ethnologue_language_index")
+	connection.executemany(
+		"INSERT INTO ethnologue_language_index VALUES (?, ?, ?, ?)",
+		((lang_id,) + entry for lang_id in reference_tables["ethno_langindex"].groups if lang_id != "LangID" for entry in reference_tables["ethno_langindex"].group(lang_id)))
+
+	connection.execute("DELETE FROM ethnologue_country_codes")
+	connection.executemany(
+		"INSERT OR REPLACE INTO ethnologue_country_codes VALUES (?, ?, ?)",
+		reference_tables["csv_ethno_country"][1:])
+
+	connection.execute("DELETE FROM ethnologue_language_codes")
+	connection.executemany(
+		"INSERT OR REPLACE INTO ethnologue_language_codes VALUES (?, ?, ?, ?)",
+		reference_tables["csv_ethno_langcode"][1:])
+
+# =========================================================================
+# Write the results of a project into the store
+def write_sqlite_project(connection, project, dialect_info_dict_out, dialect_info_dict_ethno_country_out):
+	connection.execute("DELETE FROM dialects WHERE project = ?", (project,))
+	dialect_rows = []
+	for lang_name, lang_info in dialect_info_dict_out.items():
+		# NOTE: Same preference as for the output dialect dictionary, languages.csv is more specific for coordinates
+		latitude = coordinate_or_none(lang_info.get("latitude_l")) 
+		if latitude is None:
+			latitude = coordinate_or_none(lang_info.get("latitude_ld"))
+		longitude = coordinate_or_none(lang_info.get("longitude_l"))
+		if longitude is None:
+			longitude = coordinate_or_none(lang_info.get("longitude_ld"))
+		dialect_rows.append((
+			project, lang_name,
+			lang_info.get("glottocode_ld") or lang_info.get("glottocode_l") or None,
+			lang_info.get("isocode_ld") or lang_info.get("isocode_l") or None,
+			lang_info.get("level_ld") or None,
+			lang_info.get("macroarea_ld") or lang_info.get("macroarea_l") or None,
+			latitude, longitude,
+			lang_info.get("countries_l") or None,
+			lang_info.get("familyid_l") or None,
+			lang_info.get("languageid_l") or None,
+			lang_info.get("closestisocode_l") or None
+		))
+	connection.executemany("INSERT INTO dialects VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", dialect_rows)
+
+	connection.execute("DELETE FROM dialect_countries WHERE project = ?", (project,))
+	connection.executemany(
+		"INSERT INTO dialect_countries VALUES (?, ?, ?, ?, ?)",
+		((project, iso_code, lang_name, lang_country, lang_type) 
+			for iso_code, lang_names in dialect_info_dict_ethno_country_out.items() 
+			for lang_name, lang_countries in lang_names.items() 
+			for lang_country, lang_type in lang_countries.items()))
+
+# =========================================================================
+# Open the store, refresh the reference tables if necessary and add the project
+def write_sqlite_store(sqlite_file, project, reference_tables, dialect_info_dict_out, dialect_info_dict_ethno_country_out):
+	store_start = time.perf_counter()
+	# Fingerprint of the source files the reference tables are written from
+	# NOTE: The version of the reference data, so the files are not hashed again (only if they changed since their snapshot)
+	source_fingerprint = reference_tables["version"]
+
+	# NOTE: Transactions are handled explicitly, BEGIN IMMEDIATE makes parallel 
+	#		writers (batch mode) wait for each other instead of failing
+	connection = sqlite3.connect(sqlite_file, timeout=300, isolation_level=None)
+	try:
+		connection.execute("BEGIN IMMEDIATE")
+		try:
+			# Tables of another schema version are dropped (with their indexes) and created again
+			connection.execute("CREATE TABLE IF NOT EXISTS store_information (key TEXT PRIMARY KEY, value TEXT)")
+			stored_version = connection.execute("SELECT value FROM store_information WHERE key = 'schema_version'").fetchone()
+			if stored_version is None or stored_version[0] != str(sqlite_schema_version):
+				stored_tables = [row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name != 'store_information'")]
+				if len(stored_tables) > 0:
+					logger.info(f'SQLite store: schema version changed, rebuilding {sqlite_file}')
+				for table_name in stored_tables:
+					connection.execute(f'DROP TABLE "{table_name}"')
+				connection.execute("DELETE FROM store_information")
+				connection.execute("INSERT INTO store_information VALUES ('schema_version', ?)", (str(sqlite_schema_version),))
+			for statement in sqlite_schema.split(';'):
+				if statement.strip() != '':
+					connection.execute(statement)
+
+			stored_fingerprint = connection.execute("SELECT value FROM store_information WHERE key = 'sources'").fetchone()
+			if stored_fingerprint is None or stored_fingerprint[0] != source_fingerprint:
+				logger.info(f'SQLite store: writing reference tables to {sqlite_file}')
+				write_sqlite_reference_tables(connection, reference_tables)
+				connection.execute("INSERT OR REPLACE INTO store_information VALUES ('sources', ?)", (source_fingerprint,))
+
+			write_sqlite_project(connection, project, dialect_info_dict_out, dialect_info_dict_ethno_country_out)
+		except BaseException:
+			connection.execute("ROLLBACK")
+			raise
+		connection.execute("COMMIT")
+	finally:
+		connection.close()
+	logger.info(f'SQLite store: wrote project {project} to {sqlite_file} in {time.perf_counter() - store_start:.3f}s')
+
+
+""" 
+===========================================================================
+Sharded Resolution
+===========================================================================
+INPUT:	Terms (or ISO codes) to be looked up, e.g. the 100k+ names of a very
+		large input.
+OUTPUT: The same information as looked up one after another, from several 
+		worker processes (--resolve-workers). Each worker looks up a 
+		contiguous shard of the terms and the shards are merged back in 
+		the order of the terms, so the output does not depend on the number 
+		of workers. The workers are forked once the tables (and indexes) are 
+		loaded, so they share them with the main process instead of 
+		receiving a pickled copy.
+"""
+# Smaller shards are not worth forking a process for
+resolve_min_shard = 2000
+
+# NOTE: Set right before the worker processes are forked (as shared_reference_tables in the batch mode),
+#		the lock keeps lookups of several threads (such as library callers) from replacing it for each other
+shared_resolution = None
+shared_resolution_lock = threading.Lock()
+
+# =========================================================================
+# Number of shards for this many terms with the given number of worker processes (0: one per CPU)
+# Returns 1 if they are looked up without workers
+def resolve_shard_count(term_count, workers=1):
+	if workers == 0:
+		workers = os.cpu_count() or 1
+	# NOTE: Sharing the tables without copying relies on fork, 
+	#		inside a worker of the batch mode the projects are already run in parallel
+	if workers < 2 or "fork" not in multiprocessing.get_all_start_methods() or multiprocessing.parent_process() is not None:
+		return 1
+	return max(1, min(workers, term_count // resolve_min_shard))
+
+# =========================================================================
+# Glottolog Data for one shard of terms (inside a worker process)
+def resolve_glottolog_shard(shard_items):
+	reference_tables, name_matching = shared_resolution
+	shard_dict = dict(shard_items)
+	filter_glottolog_ld_data(shard_dict, reference_tables["csv_glotto_langdial"], reference_tables["glotto_langdial_names"], name_matching)
+	filter_glottolog_l_data(shard_dict, reference_tables["csv_glotto_lang"], reference_tables["glotto_lang_names"], reference_tables["glotto_lang_ids"], name_matching)
+	return list(shard_dict.items())
+
+# =========================================================================
+# Ethnologue Data for one shard of ISO codes (inside a worker process)
+def expand_iso_code_shard(shard_items):
+	reference_tables, name_matching = shared_resolution
+	shard_ethno = dict(shard_items)
+	filter_ethnologue_li(shard_ethno, reference_tables["ethno_langindex"])
+	return list(shard_ethno.items())
+
+# =========================================================================
+# Look up the items of lookup_dict in shard_count worker processes, the results replace the items in place
+def run_sharded(shard_function, lookup_dict, shard_count, reference_tables, table_names, name_matching=None):
+	global shared_resolution
+
+	# Tables and indexes used by the workers are loaded before forking, so they are shared
+	for table_name in table_names:
+		reference_tables[table_name]
+	if name_matching is not None:
+		get_name_match_index(reference_tables)
+	# NOTE: A fork while the background thread is loading (and holding a lock) could leave the workers stuck or with half built tables
+	reference_tables.wait_for_preload()
+
+	# Contiguous shards of about the same size
+	lookup_items = list(lookup_dict.items())
+	shard_bounds = [len(lookup_items) * shard_number // shard_count for shard_number in range(shard_count + 1)]
+	shards = [lookup_items[shard_bounds[shard_number]:shard_bounds[shard_number + 1]] for shard_number in range(shard_count)]
+
+	with shared_resolution_lock:
+		shared_resolution = (reference_tables, name_matching)
+		# Keep the garbage collector from touching (and thereby copying) the shared tables in the workers
+		gc.freeze()
+		try:
+			with concurrent.futures.ProcessPoolExecutor(max_workers=shard_count, mp_context=multiprocessing.get_context("fork")) as executor:
+				# NOTE: map returns the shards in order, assigning existing keys keeps the order of lookup_dict
+				for shard_items in executor.map(shard_function, shards):
+					for lookup_key, lookup_info in shard_items:
+						lookup_dict[lookup_key] = lookup_info
+		finally:
+			gc.unfreeze()
+			shared_resolution = None
+	logger.info(f'Sharded lookup: {len(lookup_items)} items in {shard_count} worker processes')
+	return lookup_dict
+
+
+""" 
+===========================================================================
+Term Result Cache
+===========================================================================
+INPUT:	The terms and ISO codes of a project.
+OUTPUT: The Glottolog information per term and the Ethnologue information
+		per ISO code, kept in ./data/cache/terms/<lang>.pickle between runs.
+		A re-run only looks up terms and ISO codes that are not in the cache.
+		The cache is dropped when the reference data or the name matching 
+		settings change, entries no longer used by the project are removed.
+"""
+# NOTE: Next to the reference data (like reference_cache_path), so it does not depend on the working directory
+term_cache_path = os.path.join(script_path, 'data/cache/terms/')
+# NOTE: Increase with every change of the stored term information, caches of other formats are dropped
+term_cache_format = 2
+
+# =========================================================================
+# Load the term cache of a project (empty if missing or made for other reference data or settings)
+def load_term_cache(lang, reference_tables, name_matching=None):
+	cache_key = [reference_tables["version"], "exact", None, term_cache_format]
+	if name_matching is not None:
+		cache_key = [reference_tables["version"], name_matching["mode"], name_matching["threshold"], term_cache_format]
+	term_cache = {
+		"key":cache_key,
+		"terms":{},
+		"iso_codes":{}
+	}
+	cache_file = f'{term_cache_path}{lang}.pickle'
+	if os.path.isfile(cache_file):
+		try:
+			with open(cache_file, 'rb') as f:
+				stored_cache = pickle.load(f)
+			if stored_cache["key"] == cache_key:
+				term_cache["terms"] = stored_cache["terms"]
+				term_cache["iso_codes"] = stored_cache["iso_codes"]
+		except (OSError, EOFError, KeyError, pickle.UnpicklingError) as error:
+			logger.warning(f'Term cache: ignoring unreadable {cache_file} ({error})')
+	# Statistics of this run and the entries it used (only those are stored again)
+	term_cache["used_terms"] = set()
+	term_cache["used_iso_codes"] = set()
+	term_cache["reused"] = 0
+	term_cache["resolved"] = 0
+	return term_cache
+
+# =========================================================================
+# Store the entries used in this run
+def save_term_cache(lang, term_cache):
+	stored_cache = {
+		"key":term_cache["key"],
+		"terms":{term:term_cache["terms"][term] for term in term_cache["used_terms"]},
+		"iso_codes":{iso_code:term_cache["iso_codes"][iso_code] for iso_code in term_cache["used_iso_codes"]}
+	}
+	os.makedirs(term_cache_path, exist_ok=True)
+	cache_file = f'{term_cache_path}{lang}.pickle'
+	with open(f'{cache_file}.tmp', 'wb') as f:
+		pickle.dump(stored_cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+	os.replace(f'{cache_file}.tmp', cache_file)
+	logger.info(f'Term cache: reused {term_cache["reused"]}, looked up {term_cache["resolved"]} terms and ISO codes')
+
+# =========================================================================
+# Glottolog Data for terms, taken from the term cache where possible
+def resolve_glottolog_terms(dialect_info_dict, reference_tables, name_matching=None, term_cache=None, workers=1):
+	uncached_dict = dialect_info_dict
+	if term_cache is not None:
+		uncached_dict = {}
+		for lang_key in dialect_info_dict.keys():
+			term_cache["used_terms"].add(lang_key)
+			if lang_key in term_cache["terms"]:
+				dialect_info_dict[lang_key] = dict(term_cache["terms"][lang_key])
+			else:
+				uncached_dict[lang_key] = dialect_info_dict[lang_key]
+		term_cache["reused"] += len(dialect_info_dict) - len(uncached_dict)
+		term_cache["resolved"] += len(uncached_dict)
+
+	# NOTE: uncached_dict holds the same items as dialect_info_dict, so these are filled in place
+	# NOTE: Without terms to look up the Glottolog tables are not needed (and not loaded)
+	if len(uncached_dict) == 0:
+		return dialect_info_dict
+	shard_count = resolve_shard_count(len(uncached_dict), workers)
+	if shard_count > 1:
+		with profile_stage("glottolog_shards"):
+			run_sharded(resolve_glottolog_shard, uncached_dict, shard_count, reference_tables, 
+				["csv_glotto_langdial", "glotto_langdial_names", "csv_glotto_lang", "glotto_lang_names", "glotto_lang_ids"], name_matching)
+		# NOTE: The workers return new items, which replace the items of the cached terms' dictionary as well
+		dialect_info_dict.update(uncached_dict)
+	else:
+		with profile_stage("glottolog_ld"):
+			filter_glottolog_ld_data(uncached_dict, reference_tables["csv_glotto_langdial"], reference_tables["glotto_langdial_names"], name_matching)
+		with profile_stage("glottolog_l"):
+			filter_glottolog_l_data(uncached_dict, reference_tables["csv_glotto_lang"], reference_tables["glotto_lang_names"], reference_tables["glotto_lang_ids"], name_matching)
+
+	if profile_metrics is not None:
+		count_glottolog_lookups(uncached_dict, len(dialect_info_dict) - len(uncached_dict))
+
+	if term_cache is not None:
+		for lang_key in uncached_dict.keys():
+			term_cache["terms"][lang_key] = dict(uncached_dict[lang_key])
+	return dialect_info_dict
+
+# =========================================================================
+# Ethnologue Data for ISO codes, taken from the term cache where possible
+def expand_iso_codes(dialect_info_dict_ethno, reference_tables, term_cache=None, workers=1):
+	uncached_ethno = dialect_info_dict_ethno
+	if term_cache is not None:
+		uncached_ethno = {}
+		for iso_code in dialect_info_dict_ethno.keys():
+			term_cache["used_iso_codes"].add(iso_code)
+			if iso_code in term_cache["iso_codes"]:
+				dialect_info_dict_ethno[iso_code] = copy.deepcopy(term_cache["iso_codes"][iso_code])
+			else:
+				uncached_ethno[iso_code] = dialect_info_dict_ethno[iso_code]
+		term_cache["reused"] += len(dialect_info_dict_ethno) - len(uncached_ethno)
+		term_cache["resolved"] += len(uncached_ethno)
+
+	if len(uncached_ethno) == 0:
+		return dialect_info_dict_ethno
+	shard_count = resolve_shard_count(len(uncached_ethno), workers)
+	if shard_count > 1:
+		with profile_stage("ethnologue_shards"):
+			run_sharded(expand_iso_code_shard, uncached_ethno, shard_count, reference_tables, ["ethno_langindex"])
+		dialect_info_dict_ethno.update(uncached_ethno)
+	else:
+		with profile_stage("ethnologue"):
+			filter_ethnologue_li(uncached_ethno, reference_tables["ethno_langindex"])
+
+	if profile_metrics is not None:
+		count_ethnologue_lookups(uncached_ethno, reference_tables["ethno_langindex"], len(dialect_info_dict_ethno) - len(uncached_ethno))
+
+	if term_cache is not None:
+		for iso_code in uncached_ethno.keys():
+			term_cache["iso_codes"][iso_code] = copy.deepcopy(uncached_ethno[iso_code])
+	return dialect_info_dict_ethno
+
+# =========================================================================
+# Metrics of the Glottolog lookups (a term found in a table reads one row of it, found through the indexes)
+def count_glottolog_lookups(looked_up_dict, cached_terms):
+	count_metric("glottolog_ld", "terms", len(looked_up_dict))
+	count_metric("glottolog_l", "terms", len(looked_up_dict))
+	count_metric("term_cache", "terms_reused", cached_terms)
+	for lang_key in looked_up_dict.keys():
+		lang_info = looked_up_dict[lang_key]
+		for table_name, found_key in [("glottolog_ld", "glottocode_ld"), ("glottolog_l", "id_l")]:
+			if found_key in lang_info:
+				count_metric(table_name, "hits")
+				count_metric(table_name, "rows_read")
+			else:
+				count_metric(table_name, "misses")
+		for match_key in ["match_method_ld", "match_method_l"]:
+			if match_key in lang_info:
+				count_metric("name_matching", lang_info[match_key])
+
+# =========================================================================
+# Metrics of the Ethnologue lookups (all rows of an ISO code are read)
+def count_ethnologue_lookups(looked_up_ethno, ethno_langindex, cached_iso_codes):
+	count_metric("ethnologue", "iso_codes", len(looked_up_ethno))
+	count_metric("term_cache", "iso_codes_reused", cached_iso_codes)
+	for iso_code in looked_up_ethno.keys():
+		first_row, end_row = ethno_langindex.groups.get(iso_code, (0, 0))
+		if end_row > first_row:
+			count_metric("ethnologue", "hits")
+			count_metric("ethnologue", "rows_read", end_row - first_row)
+			count_metric("ethnologue", "names", len(looked_up_ethno[iso_code]))
+		else:
+			count_metric("ethnologue", "misses")
+
+
+""" 
+===========================================================================
+GeoJSON Tiles
+===========================================================================
+INPUT:	The found varieties of a project with their Glottolog information.
+OUTPUT: The varieties with coordinates as GeoJSON points (numeric [lon, lat]
+		and the properties glottocode, iso639, countries, level), split into
+		the map tiles of one zoom level (--geojson-zoom, as used by Leaflet
+		or OpenLayers: 2^zoom × 2^zoom tiles in Web Mercator), so the map
+		only loads the tiles in view.
+			output/geojson/<zoom>/<x>/<y>.geojson	one FeatureCollection per tile
+			output/geojson/index.json				features and bounds of each tile
+		Every tile is streamed to disk feature by feature.
+"""
+# Web Mercator ends at about ±85.0511° latitude
+geojson_max_latitude = 85.05112878
+
+# =========================================================================
+# Map tile (x, y) of a location at a zoom level
+def geojson_tile(latitude, longitude, zoom):
+	tile_count = 2 ** zoom
+	latitude = max(-geojson_max_latitude, min(geojson_max_latitude, latitude))
+	tile_x = int((longitude + 180) / 360 * tile_count)
+	latitude_radians = math.radians(latitude)
+	tile_y = int((1 - math.log(math.tan(latitude_radians) + 1 / math.cos(latitude_radians)) / math.pi) / 2 * tile_count)
+	return min(max(tile_x, 0), tile_count - 1), min(max(tile_y, 0), tile_count - 1)
+
+# =========================================================================
+# GeoJSON point of a variety (None without coordinates)
+def variety_feature(lang_name, lang_info, canonical_id=None):
+	coordinates = variety_coordinates(lang_info)
+	if coordinates is None:
+		return None
+	latitude, longitude = coordinates
+	feature_properties = {"name":lang_name}
+	glottocode = lang_info.get("glottocode_ld") or lang_info.get("id_l")
+	if glottocode:
+		feature_properties["glottocode"] = glottocode
+	iso_code = lang_info.get("isocode_ld") or lang_info.get("isocode_l")
+	if iso_code:
+		feature_properties["iso639"] = iso_code
+	if lang_info.get("countries_l"):
+		feature_properties["countries"] = lang_info["countries_l"].split(';')
+	# NOTE: Only languages_and_dialects_geo.csv has a level, in languages.csv dialects have a Language_ID
+	if lang_info.get("level_ld"):
+		feature_properties["level"] = lang_info["level_ld"]
+	elif "id_l" in lang_info:
+		feature_properties["level"] = "dialect" if lang_info.get("languageid_l") else "language"
+	if canonical_id is not None:
+		feature_properties["canonicalId"] = canonical_id
+	variety_point = {
+		"type":"Feature",
+		"geometry":{"type":"Point", "coordinates":[longitude, latitude]},
+		"properties":feature_properties
+	}
+	return variety_point
+
+# =========================================================================
+# Text chunks of one tile, a FeatureCollection written one feature at a time
+def geojson_tile_chunks(tile_features, zoom, tile_x, tile_y):
+	yield json.dumps({"type":"FeatureCollection", "tile":{"z":zoom, "x":tile_x, "y":tile_y}}, ensure_ascii=False)[:-1]
+	yield ', "features": ['
+	for feature_number, variety_point in enumerate(tile_features):
+		if feature_number > 0:
+			yield ',\n'
+		yield json.dumps(variety_point, ensure_ascii=False)
+	yield ']}\n'
+
+# =========================================================================
+# Write the tiles of all varieties with coordinates, returns whether each file was written (or unchanged)
+def write_geojson_tiles(geojson_path, dialect_info_dict_out, zoom=4, dialect_clusters=None):
+	# Tile → names of its varieties (the features themselves are only built while writing)
+	tile_names = {}
+	for lang_name in dialect_info_dict_out.keys():
+		coordinates = variety_coordinates(dialect_info_dict_out[lang_name])
+		if coordinates is None:
+			continue
+		tile_key = geojson_tile(coordinates[0], coordinates[1], zoom)
+		if tile_key in tile_names:
+			tile_names[tile_key].append(lang_name)
+		else:
+			tile_names[tile_key] = [lang_name]
+
+	written_files = []
+	tile_files = set()
+	geojson_index = {"zoom":zoom, "features":0, "tiles":{}}
+	for tile_x, tile_y in sorted(tile_names.keys()):
+		tile_features = (variety_feature(lang_name, dialect_info_dict_out[lang_name], 
+			dialect_clusters["aliases"].get(lang_name) if dialect_clusters is not None else None) for lang_name in tile_names[(tile_x, tile_y)])
+		tile_file = f'{geojson_path}{zoom}/{tile_x}/{tile_y}.geojson'
+		os.makedirs(os.path.dirname(tile_file), exist_ok=True)
+		written_files.append(write_output_file(tile_file, geojson_tile_chunks(tile_features, zoom, tile_x, tile_y)))
+		tile_files.add(os.path.normpath(tile_file))
+
+		# Bounds as [west, south, east, north]
+		tile_coordinates = [variety_coordinates(dialect_info_dict_out[lang_name]) for lang_name in tile_names[(tile_x, tile_y)]]
+		geojson_index["tiles"][f'{zoom}/{tile_x}/{tile_y}'] = {
+			"features":len(tile_coordinates),
+			"bbox":[min(longitude for latitude, longitude in tile_coordinates), min(latitude for latitude, longitude in tile_coordinates),
+				max(longitude for latitude, longitude in tile_coordinates), max(latitude for latitude, longitude in tile_coordinates)]
+		}
+		geojson_index["features"] += len(tile_coordinates)
+
+	# Tiles of earlier runs without varieties now (or of another zoom level) are removed
+	for old_tile_file in glob.glob(f'{geojson_path}*/*/*.geojson'):
+		if os.path.normpath(old_tile_file) not in tile_files:
+			os.remove(old_tile_file)
+			# NOTE: Directories of the removed tiles are only removed once they are empty
+			for tile_directory in [os.path.dirname(old_tile_file), os.path.dirname(os.path.dirname(old_tile_file))]:
+				try:
+					os.rmdir(tile_directory)
+				except OSError:
+					break
+
+	written_files.append(write_json_file(f'{geojson_path}index.json', geojson_index))
+	logger.info(f'GeoJSON: {geojson_index["features"]} varieties in {len(geojson_index["tiles"])} tiles (zoom {zoom})')
+	return written_files
+
+
+""" 
+===========================================================================
+Project Results
+===========================================================================
+INPUT:	The terms of a project and the reference data.
+OUTPUT: The dictionaries written as output files, shared by the projects
+		(run_project) and the library API (DialectOntology).
+"""
+# =========================================================================
+# Look up terms in Glottolog Data, their ISO codes in Ethnologue Data
+def resolve_input_terms(dialect_info_dict, reference_tables, name_matching=None, term_cache=None, workers=1):
+	# Glottolog Data
+	# NOTE: The lookup indexes of the reference data are reused for the new language names later on
+	dialect_info_dict = resolve_glottolog_terms(dialect_info_dict, reference_tables, name_matching, term_cache, workers)
+
+	# ISO Codes from Glottolog
+	with profile_stage("select_iso_codes"):
+		dialect_info_dict_ethno_country = select_iso_codes(dialect_info_dict)
+
+	# Ethnologue Data
+	dialect_info_dict_ethno_country = expand_iso_codes(dialect_info_dict_ethno_country, reference_tables, term_cache, workers)
+	return dialect_info_dict, dialect_info_dict_ethno_country
+
+# =========================================================================
+# Add relatives in the Glottolog hierarchy and nearby varieties of the varieties found so far
+# NOTE: Only the varieties found so far are used, the added ones are not expanded further
+def add_related_varieties(dialect_info_dict_out, reference_tables, name_matching=None, term_cache=None, family_mode=None, near_radius=0, near_k=0, workers=1):
+	# Descendants and/or ancestors of the resolved varieties in the Glottolog hierarchy
+	if family_mode is not None:
+		with profile_stage("family"):
+			family_relatives = find_family_relatives(dialect_info_dict_out, reference_tables, family_mode)
+			dialect_info_dict_family = resolve_glottolog_terms(word_list_to_dict(list(family_relatives.keys())), reference_tables, name_matching, term_cache, workers)
+			for lang_key in dialect_info_dict_family.keys():
+				dialect_info_dict_family[lang_key].update(family_relatives[lang_key])
+			dialect_info_dict_out.update(dialect_info_dict_family)
+		logger.info(f'Family hierarchy: {len(dialect_info_dict_family)} related varieties added')
+
+	# Varieties near the resolved varieties
+	if near_radius > 0 or near_k > 0:
+		with profile_stage("proximity"):
+			nearby_varieties = find_nearby_varieties(dialect_info_dict_out, reference_tables, radius_km=near_radius, k=near_k)
+			dialect_info_dict_nearby = resolve_nearby_varieties(nearby_varieties, reference_tables)
+			dialect_info_dict_out.update(dialect_info_dict_nearby)
+		logger.info(f'Proximity: {len(dialect_info_dict_nearby)} nearby varieties added')
+	return dialect_info_dict_out
+
+# =========================================================================
+# Select specific information for output dialect dictionary
+def select_dialect_info(dialect_info_dict_out, dialect_info_dict_ethno_country_out, proj, reference_tables, dialect_clusters=None):
 	dialect_info_dict_selected = {}
 	# Add basic information for dictionary file
-	project_name = args.proj
+	project_name = proj
 	current_date = date.today()
 	current_date = current_date.strftime("%d.%m.%Y")
 	base_information = {
@@ -597,6 +2912,18 @@ def main():
 		if "glottocode_ld" in dialect_info_dict_out[lang_name]:
 			if not dialect_info_dict_out[lang_name]["glottocode_ld"] == '':
 				new_lang_item["languageInformation"]["glottocode"] = dialect_info_dict_out[lang_name]["glottocode_ld"]
+		# Added as relative of another variety (--family)
+		if "related_to_fam" in dialect_info_dict_out[lang_name]:
+			new_lang_item["languageInformation"]["relatedTo"] = dialect_info_dict_out[lang_name]["related_to_fam"]
+			new_lang_item["languageInformation"]["familyRelation"] = dialect_info_dict_out[lang_name]["relation_fam"]
+		# Added as variety near another variety (--near-radius or --near-k)
+		if "near_to_geo" in dialect_info_dict_out[lang_name]:
+			new_lang_item["languageInformation"]["nearTo"] = dialect_info_dict_out[lang_name]["near_to_geo"]
+			new_lang_item["languageInformation"]["distanceKm"] = dialect_info_dict_out[lang_name]["distance_km_geo"]
+
+		# Canonical variety of this name (see Variety Clusters)
+		if dialect_clusters is not None:
+			new_lang_item["canonicalId"] = dialect_clusters["aliases"][lang_name]
 
 		dialect_info_dict_selected["dialects"][lang_name] = new_lang_item
 
@@ -613,6 +2940,10 @@ def main():
 	
 	dialect_info_dict_selected["information"]["dialects_with_info"] = number_of_keys_in_dict_with_info
 
+	# Country names and areas, language status and primary names from Ethnologue Data
+	with profile_stage("enrich"):
+		dialect_info_dict_selected = enrich_dialect_info(dialect_info_dict_selected, dialect_info_dict_ethno_country_out.keys(), reference_tables)
+
 	#for key in dialect_info_dict_selected.keys():
 	#	print(key)
 		# → "information" and "dialects"
@@ -623,30 +2954,803 @@ def main():
 	# → <class 'dict'>
 	#print(dialect_info_dict_selected)
 	#sys.exit()
-		
-		
+	return dialect_info_dict_selected
+
+
+"""
+===========================================================================
+Execution of Script
+===========================================================================
+"""
+# =========================================================================
+# Run all steps for the project in ./languages/<lang>/
+def run_project(lang, proj, reference_tables, args):
+	project_start = time.perf_counter()
+	input_path = f'./languages/{lang}/'
+
+	# Optional: Metrics (--profile) and function statistics (--profile-stats) of this project
+	if args.profile:
+		reset_profile()
+	project_profiler = None
+	if args.profile_stats:
+		project_profiler = cProfile.Profile()
+		project_profiler.enable()
+
+	# Optional: Terms of very large inputs are looked up by several worker processes (--resolve-workers)
+	resolve_workers = args.resolve_workers
+
+	# Language Files
+	inter_path = f'{input_path}/inter/'
+	output_path = f'{input_path}/output/'
+	
+	# Create output directory if not existing
+	if not args.no_inter:
+		create_directory(inter_path)
+	create_directory(output_path)
+
+	# NOTE: None unless names are also matched normalized or fuzzy (--match)
+	name_matching = prepare_name_matching(reference_tables, args.match, args.match_threshold)
+
+	# Results of earlier runs for the same terms and ISO codes (--no-term-cache to look up everything)
+	term_cache = None
+	if not args.no_term_cache:
+		with profile_stage("term_cache"):
+			term_cache = load_term_cache(lang, reference_tables, name_matching)
+
+	# Reference tables are loaded when first used, without earlier results the Glottolog tables are certainly needed
+	# NOTE: So they are loaded in the background while the input is read (if there is any input),
+	#		LanguageIndex.tab is only loaded once ISO codes are found
+	if term_cache is None or len(term_cache["terms"]) == 0:
+		if any(os.path.isfile(input_file) and os.path.getsize(input_file) > 0 for input_file in glob.glob(f'{input_path}*')):
+			reference_tables.preload(["glottolog_ld", "glottolog_l"])
+
+	if args.chunk_size > 0:
+		# Streaming: Input Language Terms are read and looked up in chunks of distinct names (--chunk-size)
+		# NOTE: Repeated names are dropped while reading, so the input list only holds each name once
+		#		(only the parsing is streamed, all distinct names and results are kept for the output)
+		dialect_word_list = []
+		dialect_info_dict = {}
+		dialect_info_dict_ethno_country = {}
+		dialect_word_chunks = stream_language_names(input_path, args.chunk_size)
+		while True:
+			# NOTE: Only reading the chunk is timed as read_input, its lookups are stages of their own
+			with profile_stage("read_input"):
+				dialect_word_chunk = next(dialect_word_chunks, None)
+			if dialect_word_chunk is None:
+				break
+			dialect_word_list.extend(dialect_word_chunk)
+			dialect_info_dict_chunk, dialect_info_dict_ethno_country_chunk = resolve_input_terms(word_list_to_dict(dialect_word_chunk), reference_tables, name_matching, term_cache, resolve_workers)
+			dialect_info_dict.update(dialect_info_dict_chunk)
+			dialect_info_dict_ethno_country.update(dialect_info_dict_ethno_country_chunk)
+			logger.info(f'Input chunk: {len(dialect_word_chunk)} names ({len(dialect_word_list)} names in total)')
+		if args.profile:
+			count_metric("input", "distinct_terms", len(dialect_word_list))
+			count_metric("input", "chunks", -(-len(dialect_word_list) // args.chunk_size))
+	else:
+		# Input Language Terms
+		with profile_stage("read_input"):
+			dialect_word_list = read_language_names(input_path)
+			dialect_info_dict = word_list_to_dict(dialect_word_list)
+		if args.profile:
+			count_metric("input", "terms", len(dialect_word_list))
+			count_metric("input", "distinct_terms", len(dialect_info_dict))
+
+		# Glottolog Data, ISO Codes from Glottolog and Ethnologue Data
+		dialect_info_dict, dialect_info_dict_ethno_country = resolve_input_terms(dialect_info_dict, reference_tables, name_matching, term_cache, resolve_workers)
+
+	# Output files are only rewritten if their content changed
+	written_files = []
+
+	# NOTE: Writing of intermediate files for manual checking of functionalities (skipped with --no-inter)
+	# Serializing jsons and write to files
+	if not args.no_inter:
+		output_json = f'{inter_path}dialect_info_dict_intermediate.json'
+		written_files.append(write_json_file(output_json, dialect_info_dict))
+
+		output_json = f'{inter_path}dialect_country_dict_intermediate.json'
+		written_files.append(write_json_file(output_json, dialect_info_dict_ethno_country))
+
+
+	# Look up new language names found in Ethnologue Data (and the ISO codes found for them)
+	# NOTE: With --max-depth 0 this repeats until no new language names are found
+	with profile_stage("expand_new_names"):
+		dialect_info_dict_new, dialect_info_dict_ethno_country_new, expansion_rounds = expand_new_names(
+			dialect_word_list, dialect_info_dict_ethno_country, reference_tables,
+			max_depth=args.max_depth, max_names=args.max_names, name_matching=name_matching, term_cache=term_cache, workers=resolve_workers)
+	if args.profile:
+		count_metric("expansion", "rounds", len(expansion_rounds))
+		count_metric("expansion", "new_names", len(dialect_info_dict_new))
+		count_metric("expansion", "new_iso_codes", len(dialect_info_dict_ethno_country_new))
+
+	# Serializing jsons and write to files
+	if not args.no_inter:
+		output_json = f'{inter_path}dialect_info_dict_new.json'
+		written_files.append(write_json_file(output_json, dialect_info_dict_new))
+
+		output_json = f'{inter_path}dialect_country_dict_new.json'
+		written_files.append(write_json_file(output_json, dialect_info_dict_ethno_country_new))
+
+	# NOTE: CountryCodes.tab and LanguageCodes.tab are joined in below (Country and Language Status)
+
+
+	# Merge intermediate dictionaries wie new dictionaries into output files
+	# NOTE: The second list is merged into the first list and no new list is created. 
+	dialect_info_dict_out = dialect_info_dict
+	dialect_info_dict_out.update(dialect_info_dict_new)
+
+	dialect_info_dict_ethno_country_out = dialect_info_dict_ethno_country
+	dialect_info_dict_ethno_country_out.update(dialect_info_dict_ethno_country_new)
+
+	# Optional: Relatives in the Glottolog hierarchy (--family) and nearby varieties (--near-radius and/or --near-k)
+	dialect_info_dict_out = add_related_varieties(dialect_info_dict_out, reference_tables, name_matching, term_cache, 
+		family_mode=args.family, near_radius=args.near_radius, near_k=args.near_k, workers=resolve_workers)
+
+	if term_cache is not None:
+		with profile_stage("term_cache"):
+			save_term_cache(lang, term_cache)
+
+	# Serializing jsons and write to files (indented, compact or JSON Lines with --output-format)
+	# All the country information from Ethnologue
+	output_json = f'{output_path}dialect_country_dict.json'
+	written_files.append(write_json_file(output_json, dialect_info_dict_ethno_country_out, args.output_format))
+
+	# All found information from Glottolog
+	output_json = f'{output_path}dialect_info_dict_extra.json'
+	written_files.append(write_json_file(output_json, dialect_info_dict_out, args.output_format))
+
+	# Canonical varieties and the index of their names (a name → its canonical ID)
+	with profile_stage("clusters"):
+		dialect_clusters = cluster_varieties(dialect_info_dict_out, dialect_info_dict_ethno_country_out, iter_name_groups(input_path))
+	# NOTE: Always a single json file (the clusters are no dictionary of items, so there is no JSON Lines form)
+	output_json = f'{output_path}dialect_clusters.json'
+	written_files.append(write_json_file(output_json, dialect_clusters, "compact" if args.output_format == "compact" else "indent"))
+
+	# Select specific information for output dialect dictionary
+	dialect_info_dict_selected = select_dialect_info(dialect_info_dict_out, dialect_info_dict_ethno_country_out, proj, reference_tables, dialect_clusters)
+
 	# Selected information for each language name
-	json_object = json.dumps(dialect_info_dict_selected, indent=4)
 	output_json = f'{output_path}dialect_info_dict.json'
-	with open(output_json, "w") as outfile:
-		outfile.write(json_object)
+	written_files.append(write_json_file(output_json, dialect_info_dict_selected, stream_depth=2))
 
 	# Create a simple list of all language names and write to file
 	# NOTE: For original names from input and new ones for comparison
-	lang_name_list = []
+	output_list = (name.replace('\n','')+'\n' for name in dialect_info_dict_out.keys())
+	written_files.append(write_output_file(f'{output_path}dialect_info_list_output.txt', output_list))
+	input_list = (name.replace('\n','')+'\n' for name in dialect_word_list)
+	written_files.append(write_output_file(f'{output_path}dialect_info_list_input.txt', input_list))
+
+	# Optional: Varieties with coordinates as GeoJSON, split into map tiles (--geojson)
+	if args.geojson:
+		with profile_stage("geojson"):
+			written_files.extend(write_geojson_tiles(f'{output_path}geojson/', dialect_info_dict_out, args.geojson_zoom, dialect_clusters))
+	logger.info(f'Output files: {written_files.count(True)} written, {written_files.count(False)} unchanged')
+
+	# Optional: Reference data and results as indexed SQLite database
+	if args.sqlite:
+		with profile_stage("sqlite"):
+			write_sqlite_store(args.sqlite, lang, reference_tables, dialect_info_dict_out, dialect_info_dict_ethno_country_out)
+
+	if project_profiler is not None:
+		project_profiler.disable()
+		project_profiler.dump_stats(f'{output_path}profile.pstats')
+		logger.info(f'Profile: function statistics written to {output_path}profile.pstats')
+	if args.profile:
+		count_metric("output", "dialects", dialect_info_dict_selected["information"]["dialects"])
+		count_metric("output", "dialects_with_info", dialect_info_dict_selected["information"]["dialects_with_info"])
+		write_profile_report(f'{output_path}profile.json', lang, time.perf_counter() - project_start, args)
+
+	# Summary of this project (used by the batch mode)
+	project_summary = {
+		"lang":lang,
+		"seconds":round(time.perf_counter() - project_start, 3),
+		"dialects":dialect_info_dict_selected["information"]["dialects"],
+		"dialects_with_info":dialect_info_dict_selected["information"]["dialects_with_info"]
+	}
+	return project_summary
+
+
+""" 
+===========================================================================
+Batch Mode
+===========================================================================
+INPUT:	Several language directories (--all or --langs German,Kurdish).
+OUTPUT: The usual output files of each project and a summary of all projects.
+		The reference data is loaded once in the main process, the projects
+		are processed in parallel by a pool of worker processes.
+"""
+# NOTE: Set right before the worker processes are forked, so that every worker 
+#		shares the loaded tables with the main process instead of receiving a copy.
+shared_reference_tables = None
+
+# =========================================================================
+# Run one project inside a worker process
+def run_project_worker(lang, proj, args):
+	return run_project(lang, proj, shared_reference_tables, args)
+
+# =========================================================================
+# List all project directories in ./languages/
+def list_language_directories():
+	language_directories = []
+	for lang in sorted(os.listdir('./languages/')):
+		if os.path.isdir(f'./languages/{lang}'):
+			language_directories.append(lang)
+	return language_directories
+
+# =========================================================================
+# Run several projects with the same reference data
+def run_batch(langs, reference_tables, args):
+	global shared_reference_tables
+	batch_start = time.perf_counter()
+	workers = min(args.workers if args.workers > 0 else os.cpu_count() or 1, len(langs))
+
+	project_summaries = {}
+	# NOTE: Sharing the tables without copying relies on fork, elsewhere the projects run one after another
+	if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+		# NOTE: A fork while the background thread is loading (and holding a lock) could leave the workers stuck
+		reference_tables.wait_for_preload()
+		shared_reference_tables = reference_tables
+		# Keep the garbage collector from touching (and thereby copying) the shared tables in the workers
+		gc.freeze()
+		try:
+			with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as executor:
+				project_futures = {}
+				for lang in langs:
+					project_futures[lang] = executor.submit(run_project_worker, lang, f'{lang} Varieties', args)
+				for lang in langs:
+					try:
+						project_summaries[lang] = project_futures[lang].result()
+					except Exception as error:
+						project_summaries[lang] = {"lang":lang, "error":repr(error)}
+		finally:
+			gc.unfreeze()
+	else:
+		for lang in langs:
+			try:
+				project_summaries[lang] = run_project(lang, f'{lang} Varieties', reference_tables, args)
+			except Exception as error:
+				project_summaries[lang] = {"lang":lang, "error":repr(error)}
+
+	# Summary of all projects
+	print(f'Batch of {len(langs)} projects with {workers} worker(s) in {time.perf_counter() - batch_start:.3f}s')
+	print(f'{"Project":<30}{"Seconds":>10}{"Dialects":>10}{"With info":>11}')
+	for lang in langs:
+		project_summary = project_summaries[lang]
+		if "error" in project_summary:
+			print(f'{lang:<30} failed: {project_summary["error"]}')
+		else:
+			print(f'{lang:<30}{project_summary["seconds"]:>10.3f}{project_summary["dialects"]:>10}{project_summary["dialects_with_info"]:>11}')
+	return [project_summaries[lang] for lang in langs]
+
+
+""" 
+===========================================================================
+Release Update
+===========================================================================
+INPUT:	A new Glottolog or Ethnologue release dropped into ./data/ and the 
+		projects to update (--release-diff with --lang, --langs or --all).
+OUTPUT: The rows changed between the releases, compared with the snapshots 
+		of the previous release in ./data/cache/reference/ (keyed by 
+		glottocode, by LangID + CountryID + Name, by CountryID or by LangID).
+		Only the terms and ISO codes affected by these rows are removed from
+		the term cache of each project, all others are reused, so an update
+		costs time proportional to the changes. Each project gets a report 
+		of its added, removed and modified varieties in 
+		output/release_changes.json.
+"""
+# =========================================================================
+# Rows of a source by their key (header rows are left out)
+def release_rows(source_name, source_tables):
+	if source_name == "glottolog_ld":
+		csv_glotto_langdial = source_tables["csv_glotto_langdial"]
+		return {csv_glotto_langdial[row_number][0]:csv_glotto_langdial[row_number] for row_number in range(1, len(csv_glotto_langdial))}
+	if source_name == "glottolog_l":
+		csv_glotto_lang = source_tables["csv_glotto_lang"]
+		return {csv_glotto_lang[row_number][0]:csv_glotto_lang[row_number] for row_number in range(1, len(csv_glotto_lang))}
+	if source_name == "ethnologue_li":
+		ethno_langindex = source_tables["ethno_langindex"]
+		source_rows = {}
+		for lang_id in ethno_langindex.groups.keys():
+			if lang_id == "LangID":
+				continue
+			for lang_country, lang_type, lang_name in ethno_langindex.group(lang_id):
+				source_rows[(lang_id, lang_country, lang_name)] = lang_type
+		return source_rows
+	if source_name == "ethnologue_ci":
+		return source_tables["ethno_country_index"]
+	if source_name == "ethnologue_lc":
+		return source_tables["ethno_langcode_index"]
+	raise KeyError(f'Unknown reference source {source_name}')
+
+# =========================================================================
+# Keys of the rows added, removed and modified in the new release
+def diff_release_rows(old_rows, new_rows):
+	row_changes = {
+		"added":[row_key for row_key in new_rows.keys() if row_key not in old_rows],
+		"removed":[row_key for row_key in old_rows.keys() if row_key not in new_rows],
+		"modified":[row_key for row_key in new_rows.keys() if row_key in old_rows and old_rows[row_key] != new_rows[row_key]]
+	}
+	return row_changes
+
+# =========================================================================
+# Compare the sources in ./data/ with the snapshots of the previous release (None if there are none)
+# NOTE: Must run before the changed sources are loaded, loading them replaces their snapshots
+def compare_releases(reference_tables):
+	release_diff = {
+		"sources":{},
+		# Terms and ISO codes whose cached lookups are no longer valid
+		"names":set(),
+		"glottocodes":set(),
+		"iso_codes":set()
+	}
+	# Tables of the previous release of each changed source
+	# NOTE: All snapshots are checked before any is replaced, so a missing or outdated one leaves all of them untouched
+	old_descriptions = {}
+	changed_sources = {}
+	for source_name, source_file in reference_tables.source_paths.items():
+		cache_file = f'{reference_tables.cache_path}{source_name}.pickle'
+		if not os.path.isfile(cache_file):
+			logger.info(f'Release update: no snapshot of the previous release of {source_file}')
+			return None
+		with open(cache_file, 'rb') as f:
+			cache_manifest = pickle.load(f)
+			if cache_manifest.get("version") != cache_format_version or source_file not in cache_manifest["sources"]:
+				logger.info(f'Release update: the snapshot of {source_file} is outdated')
+				return None
+			old_descriptions[source_file] = cache_manifest["sources"][source_file]
+			# NOTE: Kept for loading the new release, so the file is not hashed again
+			reference_tables.file_descriptions[source_name] = describe_source_file(source_file, old_descriptions[source_file])
+			if reference_tables.file_descriptions[source_name]["sha1"] == old_descriptions[source_file]["sha1"]:
+				continue
+			changed_sources[source_name] = read_snapshot_tables(f)
+
+	for source_name, old_tables in changed_sources.items():
+		# NOTE: Loads the new release and replaces the snapshot
+		reference_tables.load_source(source_name)
+		old_rows = release_rows(source_name, old_tables)
+		new_rows = release_rows(source_name, reference_tables.tables)
+		row_changes = diff_release_rows(old_rows, new_rows)
+		release_diff["sources"][source_name] = {change:len(row_keys) for change, row_keys in row_changes.items()}
+
+		changed_keys = row_changes["added"] + row_changes["removed"] + row_changes["modified"]
+		if source_name in ["glottolog_ld", "glottolog_l"]:
+			# Terms matching the name of a changed row (in either release) or found through its glottocode
+			for glottocode in changed_keys:
+				release_diff["glottocodes"].add(glottocode)
+				for source_rows in [old_rows, new_rows]:
+					if glottocode in source_rows:
+						release_diff["names"].add(source_rows[glottocode][1])
+		elif source_name == "ethnologue_li":
+			for lang_id, lang_country, lang_name in changed_keys:
+				release_diff["iso_codes"].add(lang_id)
+		# NOTE: CountryCodes.tab and LanguageCodes.tab are joined in every run (not cached), nothing to remove
+
+	release_diff["old_version"] = reference_data_version(old_descriptions)
+	release_diff["version"] = reference_tables["version"]
+	return release_diff
+
+# =========================================================================
+# Remove the entries affected by the new release from the term cache of a project
+# Returns the number of removed entries, None if the term cache was not made with the previous release
+def update_term_cache(lang, release_diff):
+	cache_file = f'{term_cache_path}{lang}.pickle'
+	try:
+		with open(cache_file, 'rb') as f:
+			stored_cache = pickle.load(f)
+	except (OSError, EOFError, pickle.UnpicklingError):
+		return None
+	if stored_cache["key"][0] != release_diff["old_version"]:
+		return None
+
+	# NOTE: A new or changed name may become the closest name of any term without an exact match
+	glottolog_changed = "glottolog_ld" in release_diff["sources"] or "glottolog_l" in release_diff["sources"]
+	match_mode = stored_cache["key"][1]
+	removed_terms = []
+	for term, term_info in stored_cache["terms"].items():
+		if term in release_diff["names"] or term_info.get("glottocode_ld") in release_diff["glottocodes"] or term_info.get("id_l") in release_diff["glottocodes"]:
+			removed_terms.append(term)
+		elif glottolog_changed and match_mode != "exact" and (term_info.get("match_method_ld") != "exact" or term_info.get("match_method_l") != "exact"):
+			removed_terms.append(term)
+	for term in removed_terms:
+		del stored_cache["terms"][term]
+	removed_iso_codes = [iso_code for iso_code in stored_cache["iso_codes"].keys() if iso_code in release_diff["iso_codes"]]
+	for iso_code in removed_iso_codes:
+		del stored_cache["iso_codes"][iso_code]
+
+	stored_cache["key"][0] = release_diff["version"]
+	with open(f'{cache_file}.tmp', 'wb') as f:
+		pickle.dump(stored_cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+	os.replace(f'{cache_file}.tmp', cache_file)
+	return len(removed_terms) + len(removed_iso_codes)
+
+# =========================================================================
+# Read an output dictionary written with write_json_file (empty if there is none)
+def read_json_output(output_file, output_format="indent"):
+	if output_format == "jsonl":
+		output_file = f'{os.path.splitext(output_file)[0]}.jsonl'
+	if not os.path.isfile(output_file):
+		return {}
+	with open(output_file, 'r') as f:
+		if output_format != "jsonl":
+			return json.load(f)
+		output_data = {}
+		for line in f:
+			output_data.update(json.loads(line))
+		return output_data
+
+# =========================================================================
+# All information of each variety in the output files of a project
+# NOTE: Includes the joined country names and language status of dialect_info_dict.json
+def read_project_varieties(lang, output_format="indent"):
+	output_path = f'./languages/{lang}/output/'
+	dialect_info_dict_out = read_json_output(f'{output_path}dialect_info_dict_extra.json', output_format)
+	dialect_info_dict_selected = read_json_output(f'{output_path}dialect_info_dict.json').get("dialects", {})
+	project_varieties = {}
 	for lang_name in dialect_info_dict_out.keys():
-		lang_name_list.append(lang_name)
-	with open(f'{output_path}dialect_info_list_output.txt', "w") as outfile:
-		for name in lang_name_list:
-			outfile.write(name.replace('\n','')+'\n')
-	with open(f'{output_path}dialect_info_list_input.txt', "w") as outfile:
-		for name in dialect_word_list:
-			outfile.write(name.replace('\n','')+'\n')
-	
+		project_varieties[lang_name] = [dialect_info_dict_out[lang_name], dialect_info_dict_selected.get(lang_name)]
+	return project_varieties
+
+# =========================================================================
+# Varieties added, removed and modified between two versions of the output files
+def diff_project_output(old_output, new_output):
+	project_changes = {
+		"added":[lang_name for lang_name in new_output.keys() if lang_name not in old_output],
+		"removed":[lang_name for lang_name in old_output.keys() if lang_name not in new_output],
+		"modified":[lang_name for lang_name in new_output.keys() if lang_name in old_output and old_output[lang_name] != new_output[lang_name]]
+	}
+	return project_changes
+
+# =========================================================================
+# Update the projects to the new release in ./data/
+def run_release_update(projects, reference_tables, args):
+	update_start = time.perf_counter()
+	release_diff = compare_releases(reference_tables)
+	if release_diff is not None and len(release_diff["sources"]) == 0:
+		logger.info('Release update: no source file changed since the last run')
+		return {}
+	if release_diff is None:
+		logger.info('Release update: all projects are processed from scratch')
+	else:
+		for source_name, source_changes in release_diff["sources"].items():
+			logger.info(f'Release update: {source_name}: {source_changes["added"]} added, {source_changes["removed"]} removed, {source_changes["modified"]} modified rows')
+	if args.no_term_cache:
+		logger.info('Release update: without term cache (--no-term-cache) all terms are looked up again')
+
+	release_changes = {}
+	for lang, proj in projects:
+		old_output = read_project_varieties(lang, args.output_format)
+		removed_entries = None
+		if release_diff is not None:
+			removed_entries = update_term_cache(lang, release_diff)
+		run_project(lang, proj, reference_tables, args)
+		project_changes = diff_project_output(old_output, read_project_varieties(lang, args.output_format))
+
+		release_changes[lang] = {
+			"sources":release_diff["sources"] if release_diff is not None else None,
+			# NOTE: None if the term cache did not belong to the previous release
+			"removedCacheEntries":removed_entries,
+			"counts":{change:len(lang_names) for change, lang_names in project_changes.items()},
+			"varieties":project_changes
+		}
+		write_json_file(f'./languages/{lang}/output/release_changes.json', release_changes[lang])
+
+	# Summary of all projects
+	print(f'Release update of {len(projects)} projects in {time.perf_counter() - update_start:.3f}s')
+	print(f'{"Project":<30}{"Added":>10}{"Removed":>10}{"Modified":>10}')
+	for lang, proj in projects:
+		project_counts = release_changes[lang]["counts"]
+		print(f'{lang:<30}{project_counts["added"]:>10}{project_counts["removed"]:>10}{project_counts["modified"]:>10}')
+	return release_changes
 
 
+""" 
+===========================================================================
+Lookup Service
+===========================================================================
+INPUT:	Names (or ISO codes) sent to a local HTTP server (--serve).
+OUTPUT: The information found for each of them, in the same structure as in
+		dialect_info_dict_extra.json (or dialect_country_dict.json).
+		The reference data stays loaded, so every request only costs the lookups.
+
+	GET  /health
+	GET  /lookup?name=Sorani&name=Northern%20Kurdish
+	POST /lookup	{"names": ["Sorani", "Northern Kurdish", ...]}
+	GET  /expand?iso=kmr&iso=ckb
+	POST /expand	{"iso_codes": ["kmr", "ckb", ...]}
+	GET  /query?country=IQ&macroarea=Eurasia&iso=sdh&level=dialect
+	GET  /complete?prefix=sor&k=10
+"""
+# =========================================================================
+# Look up names in the Glottolog data
+def lookup_names(names, reference_tables, name_matching=None, workers=1):
+	lookup_dict = word_list_to_dict(names)
+	return resolve_glottolog_terms(lookup_dict, reference_tables, name_matching, workers=workers)
+
+# =========================================================================
+# Look up ISO codes in the Ethnologue data
+def lookup_iso_codes(iso_codes, reference_tables, workers=1):
+	lookup_dict_ethno = {}
+	for iso_code in iso_codes:
+		lookup_dict_ethno[iso_code] = {}
+	return expand_iso_codes(lookup_dict_ethno, reference_tables, workers=workers)
+
+# =========================================================================
+# Key of the values in a json object posted to each path
+lookup_body_keys = {
+	"/lookup":"names",
+	"/expand":"iso_codes"
+}
+
+# =========================================================================
+# Answer the requests of the lookup service
+class LookupRequestHandler(http.server.BaseHTTPRequestHandler):
+
+	def send_json(self, status, response):
+		response_bytes = json.dumps(response, ensure_ascii=False).encode('utf-8')
+		self.send_response(status)
+		self.send_header("Content-Type", "application/json; charset=utf-8")
+		self.send_header("Content-Length", str(len(response_bytes)))
+		self.end_headers()
+		self.wfile.write(response_bytes)
+
+	def answer(self, path, values):
+		if path == "/lookup":
+			return self.send_json(200, lookup_names(values, self.server.reference_tables, self.server.name_matching))
+		if path == "/expand":
+			return self.send_json(200, lookup_iso_codes(values, self.server.reference_tables))
+		return self.send_json(404, {"error":f'unknown path {path}'})
+
+	def do_GET(self):
+		url = urllib.parse.urlsplit(self.path)
+		query = urllib.parse.parse_qs(url.query)
+		if url.path == "/health":
+			return self.send_json(200, {"status":"ok"})
+		if url.path == "/lookup":
+			return self.answer(url.path, query.get("name", []))
+		if url.path == "/complete":
+			try:
+				k = int(query.get("k", ["10"])[0])
+			except ValueError:
+				return self.send_json(400, {"error":"k must be a number"})
+			return self.send_json(200, complete_name(get_completion_index(self.server.reference_tables), query.get("prefix", [""])[0], k))
+		if url.path == "/query":
+			query_criteria = {criterion:query[criterion][0] for criterion in ["country", "iso", "macroarea", "level"] if criterion in query}
+			return self.send_json(200, query_varieties(self.server.reference_tables, query_criteria.get("country"), 
+				query_criteria.get("iso"), query_criteria.get("macroarea"), query_criteria.get("level")))
+		return self.answer(url.path, query.get("iso", []))
+
+	def do_POST(self):
+		url = urllib.parse.urlsplit(self.path)
+		try:
+			request_body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b'[]')
+		except ValueError as error:
+			return self.send_json(400, {"error":f'invalid json: {error}'})
+		# Either a plain list or {"names": [...]} for /lookup / {"iso_codes": [...]} for /expand
+		if isinstance(request_body, dict):
+			body_key = lookup_body_keys.get(url.path)
+			if body_key is None:
+				return self.send_json(404, {"error":f'unknown path {url.path}'})
+			if list(request_body.keys()) != [body_key]:
+				return self.send_json(400, {"error":f'expected {{"{body_key}": [...]}} for {url.path}'})
+			request_body = request_body[body_key]
+		if not isinstance(request_body, list) or not all(isinstance(value, str) for value in request_body):
+			return self.send_json(400, {"error":"expected a list of strings"})
+		return self.answer(url.path, request_body)
+
+	def log_message(self, format, *args):
+		# NOTE: One line per request would cost more than the lookup itself
+		if self.server.verbose:
+			sys.stderr.write(f'{self.log_date_time_string()} {format % args}\n')
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+	daemon_threads = True
+
+# =========================================================================
+# Keep the reference data loaded and answer lookups until interrupted
+def serve_lookups(reference_tables, host='127.0.0.1', port=8765, unix_socket=None, verbose=False, name_matching=None):
+	if unix_socket:
+		if os.path.exists(unix_socket):
+			os.remove(unix_socket)
+		server = ThreadingUnixHTTPServer(unix_socket, LookupRequestHandler)
+		server_address = f'unix:{unix_socket}'
+	else:
+		server = http.server.ThreadingHTTPServer((host, port), LookupRequestHandler)
+		server_address = f'http://{host}:{port}'
+	server.reference_tables = reference_tables
+	server.name_matching = name_matching
+	server.verbose = verbose
+	print(f'Lookup service: listening on {server_address}')
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		print('Lookup service: stopped')
+	finally:
+		server.server_close()
+		if unix_socket and os.path.exists(unix_socket):
+			os.remove(unix_socket)
+
+
+""" 
+===========================================================================
+Library API
+===========================================================================
+INPUT:	Names and ISO codes from other Python code (notebooks, pipelines).
+OUTPUT: The same dictionaries as the json files of a project, from reference
+		data that is loaded once per session and shared by all calls.
+
+Example:
+	from language_info import DialectOntology
+	ontology = DialectOntology(match="normalized")
+	ontology.resolve(["Central Kurdish", "Sorani"])			# as dialect_info_dict_intermediate.json
+	ontology.expand(["ckb", "kmr"])							# as dialect_country_dict_intermediate.json
+	ontology.build_output(["Central Kurdish"], "Kurdish Varieties")["dialect_info_dict"]
+"""
+class DialectOntology:
+
+	# Reference data of this session, each table is loaded once when first used (or all at once with preload)
+	def __init__(self, source_paths=None, cache_path=reference_cache_path, use_cache=True, match="exact", match_threshold=0.8, preload=False, verbose=False, workers=1, max_match_candidates=100000):
+		if source_paths is None:
+			source_paths = reference_source_paths
+		self.reference_tables = ReferenceTables(source_paths, cache_path, use_cache=use_cache)
+		# NOTE: Candidates of normalized and fuzzy matching are kept for later calls as well (the most recently used ones)
+		self.name_matching = prepare_name_matching(self.reference_tables, match, match_threshold, max_match_candidates)
+		# Progress messages of the pipeline are only shown if verbose (or if the logger "language_info" is configured)
+		self.verbose = verbose
+		if verbose:
+			show_progress()
+		# Worker processes for large lookups (see Sharded Resolution)
+		self.workers = workers
+		if preload:
+			self.reference_tables.load_all()
+
+	# =========================================================================
+	# Glottolog information for each name: name → {"glottocode_ld":..., "id_l":..., ...}
+	def resolve(self, names):
+		return lookup_names(names, self.reference_tables, self.name_matching, self.workers)
+
+	# =========================================================================
+	# Ethnologue names for each ISO code: ISO code → name → CountryID → NameType
+	def expand(self, iso_codes):
+		return lookup_iso_codes(iso_codes, self.reference_tables, self.workers)
+
+	# =========================================================================
+	# Varieties by country, ISO code, macroarea and/or level (see Reverse Lookup)
+	def query(self, country=None, iso_code=None, macroarea=None, level=None):
+		return query_varieties(self.reference_tables, country, iso_code, macroarea, level)
+
+	# =========================================================================
+	# First k names starting with the prefix, ignoring diacritics and case (see Name Completion)
+	def complete(self, prefix, k=10):
+		return complete_name(get_completion_index(self.reference_tables), prefix, k)
+
+	# =========================================================================
+	# All results of a project for these names (without writing any files):
+	#	"dialect_info_dict" (as dialect_info_dict.json),
+	#	"dialect_info_dict_extra" (as dialect_info_dict_extra.json),
+	#	"dialect_country_dict" (as dialect_country_dict.json),
+	#	"dialect_clusters" (as dialect_clusters.json)
+	# name_groups: Lists of orthographies of the same dialect (as nameOrthographies in the input json)
+	def build_output(self, names, project_name="Dialect Ontology", max_depth=1, max_names=0, family=None, near_radius=0, near_k=0, name_groups=()):
+		dialect_word_list = list(names)
+		dialect_info_dict, dialect_info_dict_ethno_country = resolve_input_terms(word_list_to_dict(dialect_word_list), self.reference_tables, self.name_matching, workers=self.workers)
+		dialect_info_dict_new, dialect_info_dict_ethno_country_new, expansion_rounds = expand_new_names(
+			dialect_word_list, dialect_info_dict_ethno_country, self.reference_tables,
+			max_depth=max_depth, max_names=max_names, name_matching=self.name_matching, workers=self.workers)
+
+		# NOTE: Merged in the same order as in run_project
+		dialect_info_dict_out = dialect_info_dict
+		dialect_info_dict_out.update(dialect_info_dict_new)
+		dialect_info_dict_ethno_country_out = dialect_info_dict_ethno_country
+		dialect_info_dict_ethno_country_out.update(dialect_info_dict_ethno_country_new)
+		dialect_info_dict_out = add_related_varieties(dialect_info_dict_out, self.reference_tables, self.name_matching, 
+			family_mode=family, near_radius=near_radius, near_k=near_k, workers=self.workers)
+
+		dialect_clusters = cluster_varieties(dialect_info_dict_out, dialect_info_dict_ethno_country_out, name_groups)
+		dialect_info_dict_selected = select_dialect_info(dialect_info_dict_out, dialect_info_dict_ethno_country_out, project_name, self.reference_tables, dialect_clusters)
+		project_output = {
+			"dialect_info_dict":dialect_info_dict_selected,
+			"dialect_info_dict_extra":dialect_info_dict_out,
+			"dialect_country_dict":dialect_info_dict_ethno_country_out,
+			"dialect_clusters":dialect_clusters
+		}
+		return project_output
+
+
+# =========================================================================
+# Command line arguments (also used to configure runs from other scripts, such as benchmark.py)
+def build_argument_parser():
+	parser = argparse.ArgumentParser(description='Create Configuration')
+	parser.add_argument('--lang', type=str, help='directory of language data', default="Kurdish")
+	parser.add_argument('--proj', type=str, help='project name', default="Kurdish Varieties Showcase")
+	parser.add_argument('--langs', type=str, help='comma separated directories of language data to process in one batch', default=None)
+	parser.add_argument('--all', action='store_true', help='process all directories in ./languages/ in one batch')
+	parser.add_argument('--workers', type=int, help='number of worker processes in batch mode (0: one per CPU)', default=0)
+	parser.add_argument('--resolve-workers', type=int, help='number of worker processes looking up the terms of a project (0: one per CPU)', default=1)
+	parser.add_argument('--serve', action='store_true', help='keep the reference data loaded and answer lookups over HTTP')
+	parser.add_argument('--host', type=str, help='host of the lookup service', default='127.0.0.1')
+	parser.add_argument('--port', type=int, help='port of the lookup service', default=8765)
+	parser.add_argument('--socket', type=str, help='serve lookups on this Unix socket instead of host and port', default=None)
+	parser.add_argument('--max-depth', type=int, help='rounds of looking up newly found names (0: until no new names are found)', default=1)
+	parser.add_argument('--max-names', type=int, help='maximum number of newly found names to look up (0: no limit)', default=0)
+	parser.add_argument('--chunk-size', type=int, help='parse the input streaming and look up distinct names in chunks of this size (0: all at once), results are kept for the output', default=0)
+	parser.add_argument('--match', type=str, choices=['exact', 'normalized', 'fuzzy'], help='how terms are matched against Glottolog names', default='exact')
+	parser.add_argument('--match-threshold', type=float, help='minimal trigram similarity (0 to 1) for --match fuzzy', default=0.8)
+	parser.add_argument('--match-cache-size', type=int, help='input terms whose match candidates the lookup service keeps (0: all)', default=100000)
+	parser.add_argument('--rebuild-cache', action='store_true', help='rebuild the binary snapshot of the reference data')
+	parser.add_argument('--query', action='store_true', help='list the varieties matching --country, --iso, --macroarea and --level (reverse lookup)')
+	parser.add_argument('--country', type=str, help='CountryID for --query, such as IQ', default=None)
+	parser.add_argument('--iso', type=str, help='ISO 639-3 code for --query, such as sdh', default=None)
+	parser.add_argument('--macroarea', type=str, help='Glottolog macroarea for --query, such as Eurasia', default=None)
+	parser.add_argument('--level', type=str, choices=['language', 'dialect'], help='Glottolog level for --query', default=None)
+	parser.add_argument('--seed-input', action='store_true', help='add the names found by --query to ./languages/<lang>/input_varieties.txt')
+	parser.add_argument('--complete', type=str, help='list the names starting with this prefix (ignoring diacritics and case)', default=None)
+	parser.add_argument('--top-k', type=int, help='number of names listed by --complete', default=10)
+	parser.add_argument('--export-completion', type=str, help='write the completion index for the frontend to this json file', default=None)
+	parser.add_argument('--geojson', action='store_true', help='also write the varieties with coordinates as GeoJSON map tiles to output/geojson/')
+	parser.add_argument('--geojson-zoom', type=int, help='zoom level of the GeoJSON tiles (2^zoom × 2^zoom tiles)', default=4)
+	parser.add_argument('--release-diff', action='store_true', help='update the projects to a new Glottolog or Ethnologue release, only looking up the affected terms')
+	parser.add_argument('--no-cache', action='store_true', help='parse the reference data without using the binary snapshot')
+	parser.add_argument('--no-term-cache', action='store_true', help='look up all terms again instead of reusing the results of earlier runs')
+	parser.add_argument('--output-format', choices=["indent", "compact", "jsonl"], help='format of dialect_info_dict_extra and dialect_country_dict (jsonl: one object per line in a .jsonl file)', default="indent")
+	parser.add_argument('--no-inter', action='store_true', help='do not write the intermediate files in ./languages/<lang>/inter/')
+	parser.add_argument('--family', type=str, choices=['descendants', 'ancestors', 'both'], help='add the descendants and/or ancestors of each found variety in the Glottolog hierarchy', default=None)
+	parser.add_argument('--near-radius', type=float, help='add Glottolog varieties within this many km of each found variety (0: off)', default=0)
+	parser.add_argument('--near-k', type=int, help='add the k nearest Glottolog varieties of each found variety, within --near-radius if given (0: off)', default=0)
+	parser.add_argument('--sqlite', type=str, help='also write reference data and results to this SQLite database', default=None)
+	parser.add_argument('--profile', action='store_true', help='write time per stage, lookup counts and peak memory to ./languages/<lang>/output/profile.json')
+	parser.add_argument('--profile-stats', action='store_true', help='also write cProfile statistics to ./languages/<lang>/output/profile.pstats')
+	return parser
+
+# =========================================================================
+def main():
+	parser = build_argument_parser()
+	args = parser.parse_args()
+	if args.query and args.country is None and args.iso is None and args.macroarea is None and args.level is None:
+		parser.error('--query needs at least one of --country, --iso, --macroarea and --level')
+	show_progress()
+	if args.profile:
+		start_profile()
+
+	# Reference Data (parsed files and lookup indexes), each table is loaded once when first used
+	reference_tables = ReferenceTables(reference_source_paths, reference_cache_path, rebuild_cache=args.rebuild_cache, use_cache=not args.no_cache)
+	# NOTE: With --release-diff the snapshots are first compared with the new release (and rebuilt afterwards)
+	if args.rebuild_cache and not args.release_diff:
+		reference_tables.load_all()
+
+	if args.release_diff:
+		# NOTE: The snapshots of the previous release are compared before any table is loaded
+		if args.all:
+			projects = [(lang, f'{lang} Varieties') for lang in list_language_directories()]
+		elif args.langs:
+			projects = [(lang.strip(), f'{lang.strip()} Varieties') for lang in args.langs.split(',') if lang.strip() != '']
+		else:
+			projects = [(args.lang, args.proj)]
+		run_release_update(projects, reference_tables, args)
+	elif args.query:
+		run_query(reference_tables, args)
+	elif args.complete is not None or args.export_completion:
+		run_completion(reference_tables, args)
+	elif args.serve:
+		# NOTE: The service keeps all tables resident, so they are loaded before the first request
+		reference_tables.load_all()
+		# NOTE: The service runs until stopped, so only the candidates of the most recently used names are kept
+		name_matching = prepare_name_matching(reference_tables, args.match, args.match_threshold, args.match_cache_size)
+		serve_lookups(reference_tables, host=args.host, port=args.port, unix_socket=args.socket, name_matching=name_matching)
+	elif args.all or args.langs:
+		# Load all tables and build the index for name matching (if needed) before the workers are forked
+		reference_tables.load_all()
+		if args.match != "exact":
+			get_name_match_index(reference_tables)
+		# NOTE: In batch mode the project name is derived from the directory name
+		if args.all:
+			langs = list_language_directories()
+		else:
+			langs = [lang.strip() for lang in args.langs.split(',') if lang.strip() != '']
+		run_batch(langs, reference_tables, args)
+	else:
+		run_project(args.lang, args.proj, reference_tables, args)
+
 
-	
 if __name__ == "__main__":
 	
-	main()
\ No newline at end of file
+	main()